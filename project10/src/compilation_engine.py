@@ -1,305 +1,249 @@
+import os, sys
+from typing import List, TextIO
+
+# the tokenizer, the parser and the syntax tree are shared with the compiler of project 11
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "project11", "src"))
 from jack_tokenizer import JackTokenizer
-from typing import TextIO
+from jack_parser import JackParser
+from jack_ast import (Class, ClassVarDec, SubroutineDec, Statement, LetStatement, IfStatement, WhileStatement,
+                      DoStatement, ReturnStatement, Expression, BinaryOp, UnaryOp, Parenthesized, IntegerConstant,
+                      StringConstant, KeywordConstant, VarName, ArrayAccess, SubroutineCall)
+
+# types that are keywords, any other type is a class name
+TYPE_KEYWORDS = ("int", "char", "boolean", "void")
+# symbols that have to be escaped in the XML output
+SYMBOL_VALUES = {"<": "&lt;", ">": "&gt;", '"': "&quot;", "&": "&amp;"}
 
 class CompilationEngine:
     def __init__(self, infile: TextIO, outfile: TextIO):
         self.infile = infile
         self.outfile = outfile
-        self.tokenizer = JackTokenizer(infile)
+        self.parser = JackParser(JackTokenizer(infile))
 
     def compile_class(self):
+        # the punctuation isn't in the syntax tree: it's written back where the grammar puts it
+        class_node: Class = self.parser.parse_class()
         self.outfile.write("<class>\n")
 
-        self._write_tag(self.tokenizer.use_token()) # class
-        self._write_tag(self.tokenizer.use_token()) # class name
-        self._write_tag(self.tokenizer.use_token()) # {
-        
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("static", "field"):
-            self.compile_class_var_dec()
-            self.tokenizer.buffer_token()
-
-        while self.tokenizer.peek_token() in ("constructor", "function", "method"):
-            self.compile_subroutine_dec()
-            self.tokenizer.buffer_token()
-        
-        self._write_tag(self.tokenizer.use_token()) # }
+        self._write_tag("keyword", "class")
+        self._write_tag("identifier", class_node.name)
+        self._write_tag("symbol", "{")
+
+        for class_var_dec in class_node.class_var_decs:
+            self.compile_class_var_dec(class_var_dec)
+
+        for subroutine_dec in class_node.subroutine_decs:
+            self.compile_subroutine_dec(subroutine_dec)
+
+        self._write_tag("symbol", "}")
 
         self.outfile.write("</class>\n")
 
-    def compile_class_var_dec(self):
+    def compile_class_var_dec(self, class_var_dec: ClassVarDec):
         self.outfile.write("<classVarDec>\n")
 
-        self._write_tag(self.tokenizer.use_token()) # static | field
-        self._write_tag(self.tokenizer.use_token()) # type: int | char | boolean | className
-        self._write_tag(self.tokenizer.use_token()) # var name
-        
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() == ",":
-            self._write_tag(self.tokenizer.use_token()) # ,
-            self._write_tag(self.tokenizer.use_token()) # varName
-            self.tokenizer.buffer_token()
-        
-        self._write_tag(self.tokenizer.use_token()) # ;
+        self._write_tag("keyword", class_var_dec.kind) # static | field
+        self._write_type(class_var_dec.type) # int | char | boolean | className
+        self._write_names(class_var_dec.names) # varName, varName...
+
+        self._write_tag("symbol", ";")
         self.outfile.write("</classVarDec>\n")
 
-    def compile_subroutine_dec(self):
+    def compile_subroutine_dec(self, subroutine_dec: SubroutineDec):
         self.outfile.write("<subroutineDec>\n")
 
-        self._write_tag(self.tokenizer.use_token()) # constructor | function | method
-        self._write_tag(self.tokenizer.use_token()) # void | type
-        self._write_tag(self.tokenizer.use_token()) # subroutine name
-        
-        self._write_tag(self.tokenizer.use_token()) # (
+        self._write_tag("keyword", subroutine_dec.kind) # constructor | function | method
+        self._write_type(subroutine_dec.return_type) # void | type
+        self._write_tag("identifier", subroutine_dec.name) # subroutine name
+
+        self._write_tag("symbol", "(")
         self.outfile.write("<parameterList>\n")
-        self.compile_parameter_list()
+        self.compile_parameter_list(subroutine_dec.parameters)
         self.outfile.write("</parameterList>\n")
-        self._write_tag(self.tokenizer.use_token()) # )
+        self._write_tag("symbol", ")")
 
-        self.compile_subroutine_body()
+        self.compile_subroutine_body(subroutine_dec)
         self.outfile.write("</subroutineDec>\n")
 
-    def compile_subroutine_body(self):
+    def compile_subroutine_body(self, subroutine_dec: SubroutineDec):
         self.outfile.write("<subroutineBody>\n")
-        self._write_tag(self.tokenizer.use_token()) # {
-        self.compile_var_dec()
-        self.compile_statements()
-        self._write_tag(self.tokenizer.use_token()) # }
-        self.outfile.write("</subroutineBody>\n")
+        self._write_tag("symbol", "{")
 
-    def compile_parameter_list(self):
-        self.tokenizer.buffer_token()
-
-        while self.tokenizer.peek_token() != ")":
-            self._write_tag(self.tokenizer.use_token()) # type
-            self._write_tag(self.tokenizer.use_token()) # varName
-            
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self._write_tag(self.tokenizer.use_token()) # ,
-                self._write_tag(self.tokenizer.use_token()) # type
-                self._write_tag(self.tokenizer.use_token()) # varName
-                self.tokenizer.buffer_token()
-
-    def compile_var_dec(self):
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() == "var":
+        for var_dec in subroutine_dec.var_decs:
             self.outfile.write("<varDec>\n")
-            self._write_tag(self.tokenizer.use_token()) # var
-            self._write_tag(self.tokenizer.use_token()) # type
-            self._write_tag(self.tokenizer.use_token()) # varName
-
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self._write_tag(self.tokenizer.use_token()) # ,
-                self._write_tag(self.tokenizer.use_token()) # varName
-                self.tokenizer.buffer_token()
-            
-            self._write_tag(self.tokenizer.use_token()) # ;
+            self._write_tag("keyword", "var")
+            self._write_type(var_dec.type)
+            self._write_names(var_dec.names)
+            self._write_tag("symbol", ";")
             self.outfile.write("</varDec>\n")
 
-            self.tokenizer.buffer_token()
+        self.compile_statements(subroutine_dec.statements)
+        self._write_tag("symbol", "}")
+        self.outfile.write("</subroutineBody>\n")
+
+    def compile_parameter_list(self, parameters: List[tuple]):
+        for i, (type, name) in enumerate(parameters):
+            if i:
+                self._write_tag("symbol", ",")
+            self._write_type(type)
+            self._write_tag("identifier", name)
 
-    def compile_statements(self): 
+    def compile_statements(self, statements: List[Statement]):
         self.outfile.write("<statements>\n")
-        
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("let", "if", "while", "do", "return"):
-            peek_token = self.tokenizer.peek_token()
-
-            if peek_token == "let":
-                self.compile_let()
-            elif peek_token == "if":
-                self.compile_if()
-            elif peek_token == "while":
-                self.compile_while()
-            elif peek_token == "do":
-                self.compile_do()
-            elif peek_token == "return":
-                self.compile_return()
-
-            # match self.tokenizer.peek_token():
-            #     case "let":
-            #         self.compile_let()
-            #     case "if":
-            #         self.compile_if()
-            #     case "while":
-            #         self.compile_while()
-            #     case "do":
-            #         self.compile_do()
-            #     case "return":
-            #         self.compile_return()
-            
-            self.tokenizer.buffer_token()
-        
+
+        for statement in statements:
+            if isinstance(statement, LetStatement):
+                self.compile_let(statement)
+            elif isinstance(statement, IfStatement):
+                self.compile_if(statement)
+            elif isinstance(statement, WhileStatement):
+                self.compile_while(statement)
+            elif isinstance(statement, DoStatement):
+                self.compile_do(statement)
+            elif isinstance(statement, ReturnStatement):
+                self.compile_return(statement)
+
         self.outfile.write("</statements>\n")
 
-    def compile_let(self):
+    def compile_let(self, let: LetStatement):
         self.outfile.write("<letStatement>\n")
-        self._write_tag(self.tokenizer.use_token()) # let
-        self._write_tag(self.tokenizer.use_token()) # varName
+        self._write_tag("keyword", "let")
+        self._write_tag("identifier", let.name)
 
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "[":
-            self._write_tag(self.tokenizer.use_token()) # [
-            self.compile_expression()
-            self._write_tag(self.tokenizer.use_token()) # ]
+        if let.index is not None:
+            self._write_tag("symbol", "[")
+            self.compile_expression(let.index)
+            self._write_tag("symbol", "]")
 
-        self._write_tag(self.tokenizer.use_token()) # =
-        self.compile_expression()
+        self._write_tag("symbol", "=")
+        self.compile_expression(let.value)
 
-        self._write_tag(self.tokenizer.use_token()) # ;
+        self._write_tag("symbol", ";")
         self.outfile.write("</letStatement>\n")
 
-    def compile_if(self):
+    def compile_if(self, if_statement: IfStatement):
         self.outfile.write("<ifStatement>\n")
-        self._write_tag(self.tokenizer.use_token()) # if
-        
-        self._write_tag(self.tokenizer.use_token()) # (
-        self.compile_expression()
-        self._write_tag(self.tokenizer.use_token()) # )
-
-        self._write_tag(self.tokenizer.use_token()) # {
-        self.compile_statements()
-        self._write_tag(self.tokenizer.use_token()) # }
-
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "else":
-            self._write_tag(self.tokenizer.use_token()) # else
-            self._write_tag(self.tokenizer.use_token()) # {
-            self.compile_statements()
-            self._write_tag(self.tokenizer.use_token()) # }
-        
+        self._write_tag("keyword", "if")
+
+        self._write_tag("symbol", "(")
+        self.compile_expression(if_statement.condition)
+        self._write_tag("symbol", ")")
+
+        self._write_tag("symbol", "{")
+        self.compile_statements(if_statement.statements)
+        self._write_tag("symbol", "}")
+
+        if if_statement.else_statements is not None:
+            self._write_tag("keyword", "else")
+            self._write_tag("symbol", "{")
+            self.compile_statements(if_statement.else_statements)
+            self._write_tag("symbol", "}")
+
         self.outfile.write("</ifStatement>\n")
 
-    def compile_while(self):
+    def compile_while(self, while_statement: WhileStatement):
         self.outfile.write("<whileStatement>\n")
-        self._write_tag(self.tokenizer.use_token()) # while
+        self._write_tag("keyword", "while")
 
-        self._write_tag(self.tokenizer.use_token()) # (
-        self.compile_expression()
-        self._write_tag(self.tokenizer.use_token()) # )
+        self._write_tag("symbol", "(")
+        self.compile_expression(while_statement.condition)
+        self._write_tag("symbol", ")")
 
-        self._write_tag(self.tokenizer.use_token()) # {
-        self.compile_statements()
-        self._write_tag(self.tokenizer.use_token()) # }
+        self._write_tag("symbol", "{")
+        self.compile_statements(while_statement.statements)
+        self._write_tag("symbol", "}")
 
         self.outfile.write("</whileStatement>\n")
 
-    def compile_do(self):
+    def compile_do(self, do: DoStatement):
         self.outfile.write("<doStatement>\n")
-        self._write_tag(self.tokenizer.use_token()) # do
-
-        self._write_tag(self.tokenizer.use_token()) # subroutineName | (className | varName)
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == ".":
-            self._write_tag(self.tokenizer.use_token()) # .
-            self._write_tag(self.tokenizer.use_token()) # subroutineName
-
-        self._write_tag(self.tokenizer.use_token()) # (
-        self.compile_expression_list()
-        self._write_tag(self.tokenizer.use_token()) # )
-
-        self._write_tag(self.tokenizer.use_token()) # ;
+        self._write_tag("keyword", "do")
+        self.compile_subroutine_call(do.call)
+        self._write_tag("symbol", ";")
         self.outfile.write("</doStatement>\n")
 
-    def compile_return(self):
+    def compile_return(self, return_statement: ReturnStatement):
         self.outfile.write("<returnStatement>\n")
-        self._write_tag(self.tokenizer.use_token()) # return
-        
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() != ";":
-            self.compile_expression()
-        
-        self._write_tag(self.tokenizer.use_token()) # ;
-        self.outfile.write("</returnStatement>\n")
+        self._write_tag("keyword", "return")
 
-    def compile_expression(self):
-        self.outfile.write("<expression>\n")
-        
-        self.compile_term()
+        if return_statement.value is not None:
+            self.compile_expression(return_statement.value)
 
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("+", "-", "*", "/", "&amp;", "|", "&lt;", "&gt;", "="):
-            self._write_tag(self.tokenizer.use_token()) # op
-            self.compile_term()
-            self.tokenizer.buffer_token()
+        self._write_tag("symbol", ";")
+        self.outfile.write("</returnStatement>\n")
 
+    def compile_expression(self, expression: Expression):
+        self.outfile.write("<expression>\n")
+        self._compile_operands(expression)
         self.outfile.write("</expression>\n")
 
-    def compile_term(self):
+    def _compile_operands(self, expression: Expression):
+        # term (op term)*: the left operands of a chain of ops are written first, flat, as they were read
+        if isinstance(expression, BinaryOp):
+            self._compile_operands(expression.left)
+            self._write_tag("symbol", SYMBOL_VALUES.get(expression.op, expression.op))
+            self.compile_term(expression.right)
+        else:
+            self.compile_term(expression)
+
+    def compile_term(self, term: Expression):
         self.outfile.write("<term>\n")
 
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "(": # (expression)
-            self._write_tag(self.tokenizer.use_token()) # (
-            self.compile_expression()
-            self._write_tag(self.tokenizer.use_token()) # )
-        elif self.tokenizer.peek_token() in ("-", "~"): # unaryOp term
-            self._write_tag(self.tokenizer.use_token()) # - | ~
-            self.compile_term()
-        else:
-            self._write_tag(self.tokenizer.use_token()) # intConst | strConst | keywordConst | varName
-            
-            self.tokenizer.buffer_token()
-            if self.tokenizer.peek_token() == "[": # varName[expression]
-                self._write_tag(self.tokenizer.use_token()) # [
-                self.compile_expression()
-                self._write_tag(self.tokenizer.use_token()) # ]
-            elif self.tokenizer.peek_token() == "(": # subroutineName(expressionList)
-                self._write_tag(self.tokenizer.use_token()) # (
-                self.compile_expression_list()
-                self._write_tag(self.tokenizer.use_token()) # )
-            elif self.tokenizer.peek_token() == ".": # (className | varName).subroutineName(expressionList)
-                self._write_tag(self.tokenizer.use_token()) # .
-                self._write_tag(self.tokenizer.use_token()) # subroutineName
-                self._write_tag(self.tokenizer.use_token()) # (
-                self.compile_expression_list()
-                self._write_tag(self.tokenizer.use_token()) # )
+        if isinstance(term, Parenthesized): # (expression)
+            self._write_tag("symbol", "(")
+            self.compile_expression(term.expression)
+            self._write_tag("symbol", ")")
+        elif isinstance(term, UnaryOp): # unaryOp term
+            self._write_tag("symbol", term.op)
+            self.compile_term(term.term)
+        elif isinstance(term, IntegerConstant):
+            self._write_tag("integerConstant", term.value)
+        elif isinstance(term, StringConstant):
+            self._write_tag("stringConstant", term.value)
+        elif isinstance(term, KeywordConstant):
+            self._write_tag("keyword", term.value)
+        elif isinstance(term, VarName):
+            self._write_tag("identifier", term.name)
+        elif isinstance(term, ArrayAccess): # varName[expression]
+            self._write_tag("identifier", term.name)
+            self._write_tag("symbol", "[")
+            self.compile_expression(term.index)
+            self._write_tag("symbol", "]")
+        elif isinstance(term, SubroutineCall):
+            self.compile_subroutine_call(term)
 
         self.outfile.write("</term>\n")
 
-    def compile_expression_list(self):
+    def compile_subroutine_call(self, call: SubroutineCall):
+        if call.receiver is not None: # (className | varName).subroutineName(expressionList)
+            self._write_tag("identifier", call.receiver)
+            self._write_tag("symbol", ".")
+        self._write_tag("identifier", call.name)
+
+        self._write_tag("symbol", "(")
+        self.compile_expression_list(call.arguments)
+        self._write_tag("symbol", ")")
+
+    def compile_expression_list(self, expressions: List[Expression]):
         self.outfile.write("<expressionList>\n")
-        
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() != ")":
-            self.compile_expression()
 
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self._write_tag(self.tokenizer.use_token()) # ,
-                self.compile_expression()
-                self.tokenizer.buffer_token()
+        for i, expression in enumerate(expressions):
+            if i:
+                self._write_tag("symbol", ",")
+            self.compile_expression(expression)
 
         self.outfile.write("</expressionList>\n")
 
-    def _write_tag(self, token) -> str:
-        token_type, token_value = token
-
-        if token_type == "KEYWORD":
-            token_tag = "keyword"
-        elif token_type == "SYMBOL":
-            token_tag = "symbol"
-        elif token_type == "INT_CONST":
-            token_tag = "integerConstant"
-        elif token_type == "STRING_CONST":
-            token_tag = "stringConstant"
-        else:
-            token_tag = "identifier"
-
-        # match token_type:
-        #     case "KEYWORD":
-        #         token_tag = "keyword"
-        #     case "SYMBOL":
-        #         token_tag = "symbol"
-        #     case "INT_CONST":
-        #         token_tag = "integerConstant"
-        #     case "STRING_CONST":
-        #         token_tag = "stringConstant"
-        #     case _:
-        #         token_tag = "identifier"
-        
+    def _write_type(self, type: str):
+        self._write_tag("keyword" if type in TYPE_KEYWORDS else "identifier", type)
+
+    def _write_names(self, names: List[str]):
+        for i, name in enumerate(names):
+            if i:
+                self._write_tag("symbol", ",")
+            self._write_tag("identifier", name)
+
+    def _write_tag(self, token_tag: str, token_value) -> None:
         self.outfile.write(f"<{token_tag}> ")
         self.outfile.write(f"{token_value}")
-        self.outfile.write(f" </{token_tag}>\n")
\ No newline at end of file
+        self.outfile.write(f" </{token_tag}>\n")
@@ -1,28 +1,97 @@
-import os, sys
+import os, sys, argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Optional
 from compilation_engine import CompilationEngine
+from build_manifest import BuildManifest
+
+def compile_file(jack_filename: str, use_mmap: bool = False, optimize: bool = True,
+                 intern_strings: bool = False) -> Optional[str]:
+    """
+    Compiles one .jack file into the .vm file next to it.
+
+    Classes only refer to each other by name in the VM code, so files compile independently of each other,
+    in any order or in parallel. The code is written to a temporary file which is then renamed, so that a
+    failed or interrupted compilation never leaves a partial .vm file behind.
+
+    Args:
+        jack_filename (str): Path to the .jack file.
+        use_mmap (bool, optional): Whether to tokenize a memory map of the source. Defaults to False.
+        optimize (bool, optional): Whether to fold constants and simplify multiplications. Defaults to True.
+        intern_strings (bool, optional): Whether to build each distinct string literal only once. Defaults to False.
+
+    Returns:
+        Optional[str]: A diagnostic if the compilation failed, located at the line and column of the token it
+            failed at when the source couldn't be parsed, else None.
+    """
+    vm_filename = os.path.splitext(jack_filename)[0] + ".vm"
+    tmp_filename = f"{vm_filename}.{os.getpid()}.tmp" # unique per process, in the same directory to rename it
+    compilation_engine = None
+
+    try:
+        with open(jack_filename, "r") as infile, open(tmp_filename, "w") as vm_out:
+            compilation_engine = CompilationEngine(infile, vm_out, use_mmap, optimize, intern_strings)
+            compilation_engine.compile_class()
+        os.replace(tmp_filename, vm_filename)
+    except Exception as e:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        position = compilation_engine.get_position() if compilation_engine else None
+        location = f"{jack_filename}:{position[0]}:{position[1]}" if position else jack_filename
+        return f"{location}: {type(e).__name__}: {e}"
+
+    return None
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python JackCompiler.py <jack-directory | jack-file-path>")
-        sys.exit(1)
-    
-    jack_input = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Compiles Jack source code into VM code.")
+    parser.add_argument("jack_input", help="path to a .jack file or to a directory of .jack files")
+    parser.add_argument("--mmap", action="store_true",
+                        help="tokenize memory maps of the sources instead of reading them into memory")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes to compile the .jack files with")
+    parser.add_argument("--no-optimize", action="store_true",
+                        help="compile every expression as written, without folding constants or simplifying multiplications")
+    parser.add_argument("--intern-strings", action="store_true",
+                        help="build each distinct string literal of a class once and reuse it, for programs that never "
+                             "modify or dispose of their literals")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip the .jack files that haven't changed since the last build, leaving their .vm files untouched")
+    args = parser.parse_args()
+
+    jack_input = args.jack_input
     if jack_input.endswith(".jack"): # input is file name
         jack_filenames = [jack_input]
     else: # input is dir name
-        jack_filenames = [os.path.join(jack_input, f) for f in os.listdir(jack_input) if f.endswith(".jack")]
+        jack_filenames = sorted(os.path.join(jack_input, f) for f in os.listdir(jack_input) if f.endswith(".jack"))
 
-    for jack_filename in jack_filenames:
-        vm_filename = os.path.splitext(jack_filename)[0] + ".vm"
-        
-        with open(jack_filename, "r") as infile, open(vm_filename, "a") as vm_out:
-            # clear the output files if already exist
-            vm_out.truncate(0)
-            vm_out.seek(0)
+    manifest = None
+    if args.incremental:
+        manifest = BuildManifest(os.path.dirname(jack_filenames[0]) if jack_filenames else jack_input,
+                                 (not args.no_optimize, args.intern_strings))
+        jack_filenames = [jack_filename for jack_filename in jack_filenames if not manifest.is_up_to_date(jack_filename)]
 
-            compilation_engine = CompilationEngine(infile, vm_out)
-            compilation_engine.compile_class()
+    if args.jobs > 1 and len(jack_filenames) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            diagnostics = list(executor.map(compile_file, jack_filenames, repeat(args.mmap), repeat(not args.no_optimize),
+                                            repeat(args.intern_strings)))
+    else:
+        diagnostics = [compile_file(jack_filename, args.mmap, not args.no_optimize, args.intern_strings)
+                       for jack_filename in jack_filenames]
+
+    if manifest:
+        for jack_filename, diagnostic in zip(jack_filenames, diagnostics):
+            if diagnostic:
+                manifest.forget(jack_filename)
+            else:
+                manifest.record(jack_filename)
+        manifest.save()
+        print(manifest.report())
+
+    failed = [diagnostic for diagnostic in diagnostics if diagnostic]
+    for diagnostic in failed:
+        print(diagnostic, file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
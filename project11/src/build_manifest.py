@@ -0,0 +1,138 @@
+import os, json, hashlib
+from typing import Dict, Optional, Tuple
+
+# the modules whose code ends up in the generated VM code: editing any of them invalidates every entry
+COMPILER_SOURCES = (
+    "jack_tokenizer.py", "jack_parser.py", "jack_ast.py", "jack_optimizer.py", "compilation_engine.py", "symbol_table.py",
+    "vm_writer.py"
+)
+
+# name of the manifest, next to the .vm files it describes
+MANIFEST_FILENAME = ".jackmanifest.json"
+
+
+def compiler_version() -> str:
+    """
+    Fingerprints the compiler itself, so that a .vm file never outlives the code that generated it.
+
+    Returns:
+        str: A hash of the compiler's source files.
+    """
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for source in COMPILER_SOURCES:
+        with open(os.path.join(src_dir, source), "rb") as infile:
+            digest.update(infile.read())
+
+    return digest.hexdigest()
+
+
+def _hash_file(filename: str) -> Optional[str]:
+    """
+    Hashes the content of a file, or returns None if it doesn't exist.
+    """
+    try:
+        with open(filename, "rb") as infile:
+            return hashlib.sha256(infile.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class BuildManifest:
+    """
+    Record of the .jack files already compiled in a directory, to skip the ones that haven't changed.
+
+    Maps the name of each .jack file to the hash of its content and the hash of the .vm file compiled from it,
+    under the version and the options of the compiler that compiled them. A file is up to date when both hashes still match: the
+    source hasn't been edited, and the .vm file is still the one the compiler wrote. Up-to-date .vm files aren't
+    touched at all, so their mtimes stay stable for the tools that read them.
+
+    Attributes:
+        manifest_filename (str): Path to the manifest.
+        version (str): The compiler version, combined with the options.
+        entries (Dict[str, Dict[str, str]]): .jack file name -> {"source": hash, "output": hash}.
+        skipped (int): Number of files found up to date.
+        compiled (int): Number of files recorded after being compiled.
+    """
+    def __init__(self, out_dir: str, options: Tuple[bool, ...] = ()):
+        """
+        Loads the manifest of a directory. Entries of another compiler version or other options are dropped.
+
+        Args:
+            out_dir (str): Directory of the .vm files.
+            options (Tuple[bool, ...], optional): The compiler options that change the generated code. Defaults to ().
+        """
+        self.manifest_filename = os.path.join(out_dir, MANIFEST_FILENAME)
+        self.version = f"{compiler_version()}{options}"
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.skipped = 0
+        self.compiled = 0
+
+        try:
+            with open(self.manifest_filename, "r") as infile:
+                manifest = json.load(infile)
+        except (FileNotFoundError, ValueError): # no manifest yet, or a corrupted one
+            return
+
+        if manifest.get("version") == self.version:
+            self.entries = manifest.get("files", {})
+
+    def is_up_to_date(self, jack_filename: str) -> bool:
+        """
+        Checks whether a .jack file can be skipped.
+
+        Args:
+            jack_filename (str): Path to the .jack file.
+
+        Returns:
+            bool: Whether the file and its .vm file are still the ones recorded.
+        """
+        entry = self.entries.get(os.path.basename(jack_filename))
+        if entry is None or entry["source"] != _hash_file(jack_filename):
+            return False
+        if entry["output"] != _hash_file(os.path.splitext(jack_filename)[0] + ".vm"):
+            return False
+
+        self.skipped += 1
+        return True
+
+    def record(self, jack_filename: str) -> None:
+        """
+        Records a .jack file that was just compiled.
+
+        Args:
+            jack_filename (str): Path to the .jack file.
+        """
+        self.entries[os.path.basename(jack_filename)] = {
+            "source": _hash_file(jack_filename),
+            "output": _hash_file(os.path.splitext(jack_filename)[0] + ".vm")
+        }
+        self.compiled += 1
+
+    def forget(self, jack_filename: str) -> None:
+        """
+        Drops the entry of a .jack file, e.g. one that failed to compile.
+
+        Args:
+            jack_filename (str): Path to the .jack file.
+        """
+        self.entries.pop(os.path.basename(jack_filename), None)
+
+    def save(self) -> None:
+        """
+        Writes the manifest back.
+
+        It is written to a temporary file which is then renamed, so that an interrupted build never leaves a
+        partial manifest behind.
+        """
+        tmp_filename = f"{self.manifest_filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, "w") as outfile:
+            json.dump({"version": self.version, "files": self.entries}, outfile, indent=1, sort_keys=True)
+        os.replace(tmp_filename, self.manifest_filename)
+
+    def report(self) -> str:
+        """
+        Summarizes how many files were skipped.
+        """
+        return f"manifest: skipped {self.skipped} of {self.skipped + self.compiled} files"
@@ -1,97 +1,121 @@
-from jack_tokenizer import JackTokenizer, JackToken
-from typing import TextIO, Literal
+from jack_tokenizer import JackTokenizer
+from jack_parser import JackParser
+from jack_optimizer import fold_constants, constant_value
+from jack_ast import (Class, ClassVarDec, SubroutineDec, Statement, LetStatement, IfStatement, WhileStatement,
+                      DoStatement, ReturnStatement, Expression, BinaryOp, UnaryOp, Parenthesized, IntegerConstant,
+                      StringConstant, KeywordConstant, VarName, ArrayAccess, SubroutineCall)
+from typing import Dict, List, Optional, TextIO, Literal, Tuple
 from symbol_table import SymbolTable, SymbolKind
 from vm_writer import VMWriter
 from itertools import count
 
 Segment = Literal["this", "static", "argument", "local"]
 
+# binary op -> the VM command computing it, or the OS function for * and /
+_BINARY_COMMANDS = {
+    "+": "add", "-": "sub", "&": "and", "|": "or", "<": "lt", ">": "gt", "=": "eq"
+}
+_BINARY_CALLS = {"*": "Math.multiply", "/": "Math.divide"}
+
 class CompilationEngine:
     """
     Translates Jack source code into VM code.
+
+    The source is first parsed into a syntax tree by `JackParser`, which is then walked to emit the VM code.
     """
-    def __init__(self, infile: TextIO, vm_out: TextIO):
+    def __init__(self, infile: TextIO, vm_out: TextIO, use_mmap: bool = False, optimize: bool = True,
+                 intern_strings: bool = False):
         """
         Initializes the CompilationEngine with input file and VM output file.
+
+        Args:
+            infile (TextIO): Input file containing Jack source code.
+            vm_out (TextIO): Output file for the VM code.
+            use_mmap (bool, optional): Whether the tokenizer scans a memory map of the input file instead of
+                reading it into memory. Defaults to False.
+            optimize (bool, optional): Whether to fold constant subexpressions and turn multiplications by
+                constants into cheaper code. Defaults to True.
+            intern_strings (bool, optional): Whether each distinct string literal of the class is built once and
+                then reused, instead of being built again every time it is evaluated. Defaults to False.
         """
         self.infile = infile
         self.vm_out = vm_out
+        self.optimize = optimize
+        self.intern_strings = intern_strings
 
         self.class_name = None
-        self.tokenizer = JackTokenizer(infile)
+        self.parser = JackParser(JackTokenizer(infile, use_mmap))
         self.symbol_table = SymbolTable()
         self.vm_writer = VMWriter(vm_out)
-        
+
         # these are used to differentiate between different jack if and while statements when translated to vm commands
         self.if_count = count()
         self.while_count = count()
+        self.string_count = count()
+
+        # interned string literal -> index of the static variable holding it
+        self.string_slots: Dict[str, int] = {}
 
-    def compile_class(self):
+    def compile_class(self, class_node: Optional[Class] = None):
         """
         Compiles a class declaration, including class variables and subroutines.
+
+        Args:
+            class_node (Class, optional): The syntax tree of the class. Defaults to parsing the input file.
         """
-        self.tokenizer.use_token() # class
-        class_name_token = self.tokenizer.use_token() # class name
-        self.class_name = class_name_token.get_value()
-        self.tokenizer.use_token() # {
-        
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("static", "field"):
-            self.compile_class_var_dec()
-            self.tokenizer.buffer_token()
+        if class_node is None:
+            class_node = self.parser.parse_class()
+        if self.optimize:
+            class_node = fold_constants(class_node)
+
+        self.class_name = class_node.name
+        for class_var_dec in class_node.class_var_decs:
+            self.compile_class_var_dec(class_var_dec)
+        for subroutine_dec in class_node.subroutine_decs:
+            self.compile_subroutine_dec(subroutine_dec)
 
-        while self.tokenizer.peek_token() in ("constructor", "function", "method"):
-            self.compile_subroutine_dec()
-            self.tokenizer.buffer_token()
-        
-        self.tokenizer.use_token() # }
+    def get_position(self) -> Optional[Tuple[int, int]]:
+        """
+        Retrieves the line and column of the token the parser stopped at, e.g. to locate a syntax error.
 
-    def compile_class_var_dec(self):
+        Returns:
+            Optional[Tuple[int, int]]: The position, or None once the class is parsed, as the syntax tree doesn't
+                keep the positions of its nodes.
+        """
+        if self.class_name is not None:
+            return None
+        return self.parser.tokenizer.get_position()
+
+    def compile_class_var_dec(self, class_var_dec: ClassVarDec):
         """
         Compiles a class variable declaration (static or field).
         """
-        kind_token = self.tokenizer.use_token() # static | field
-        type_token = self.tokenizer.use_token() # int | char | boolean | className
-        name_token = self.tokenizer.use_token() # varName
-        self.symbol_table.define(name_token.get_value(), type_token.get_value(), kind_token.get_value())
-        
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() == ",":
-            self.tokenizer.use_token() # ,
-            name_token = self.tokenizer.use_token() # varName
-            self.symbol_table.define(name_token.get_value(), type_token.get_value(), kind_token.get_value())
-            self.tokenizer.buffer_token()
-        
-        self.tokenizer.use_token() # ;
-
-    def compile_subroutine_dec(self):
+        for name in class_var_dec.names:
+            self.symbol_table.define(name, class_var_dec.type, class_var_dec.kind)
+
+    def compile_subroutine_dec(self, subroutine_dec: SubroutineDec):
         """
         Compiles a subroutine declaration (constructor, function, method).
         """
         self.symbol_table.start_subroutine() # clear subroutine symbol table
 
-        # subroutine dec
-        kind_token = self.tokenizer.use_token() # constructor | function | method
-        function_kind = kind_token.get_value()
+        function_kind = subroutine_dec.kind
+        function_name = f"{self.class_name}.{subroutine_dec.name}"
 
-        self.tokenizer.use_token() # void | type
-        name_token = self.tokenizer.use_token() # subroutine name
-        function_name = f"{self.class_name}.{name_token.get_value()}"
-        
         # param list
         if function_kind == "method":
             # this is only to account for the one extra argument that the caller passes in ("this" object address)
             # since we'll never actually look up the info of this symbol based on its name, it's not important to push its name and type
             self.symbol_table.define("_", "_", "arg")
-        self.tokenizer.use_token() # (
-        self.compile_parameter_list() # "real" arguments
-        self.tokenizer.use_token() # )
+        for type, name in subroutine_dec.parameters: # "real" arguments
+            self.symbol_table.define(name, type, "arg")
 
         # subroutine body
-        self.tokenizer.use_token() # {
-        self.compile_var_dec()
+        for var_dec in subroutine_dec.var_decs:
+            for name in var_dec.names:
+                self.symbol_table.define(name, var_dec.type, "var")
         self.vm_writer.write_function(function_name, self.symbol_table.var_count("var"))
-        
+
         if function_kind == "constructor":
             self.vm_writer.write_push("constant", self.symbol_table.var_count("field"))
             self.vm_writer.write_call("Memory.alloc", 1)
@@ -99,97 +123,40 @@ class CompilationEngine:
         elif function_kind == "method":
             self.vm_writer.write_push("argument", 0)
             self.vm_writer.write_pop("pointer", 0)
-        
-        self.compile_statements()
-        
-        self.tokenizer.use_token() # }
-
-    def compile_parameter_list(self):
-        """
-        Compiles a list of parameters for a subroutine.
-        """
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() != ")":
-            type_token = self.tokenizer.use_token() # type
-            name_token = self.tokenizer.use_token() # varName
-            self.symbol_table.define(name_token.get_value(), type_token.get_value(), "arg")
-            
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self.tokenizer.use_token() # ,
-                type_token = self.tokenizer.use_token() # type
-                name_token = self.tokenizer.use_token() # varName
-                self.symbol_table.define(name_token.get_value(), type_token.get_value(), "arg")
-                
-                self.tokenizer.buffer_token()
-
-    def compile_var_dec(self):
-        """
-        Compiles a local variable declaration within a subroutine.
-        """
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() == "var":
-            self.tokenizer.use_token() # var
-            type_token = self.tokenizer.use_token() # type
-            name_token = self.tokenizer.use_token() # varName
-            self.symbol_table.define(name_token.get_value(), type_token.get_value(), "var")
-
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self.tokenizer.use_token() # ,
-                name_token = self.tokenizer.use_token() # varName
-                self.symbol_table.define(name_token.get_value(), type_token.get_value(), "var")
-                self.tokenizer.buffer_token()
-            
-            self.tokenizer.use_token() # ;
-            self.tokenizer.buffer_token()
-
-    def compile_statements(self):
+
+        self.compile_statements(subroutine_dec.statements)
+
+    def compile_statements(self, statements: List[Statement]):
         """
         Compiles statements within a subroutine.
         """
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("let", "if", "while", "do", "return"):
-            peek_token = self.tokenizer.peek_token()
-
-            if peek_token == "let":
-                self.compile_let()
-            elif peek_token == "if":
-                self.compile_if()
-            elif peek_token == "while":
-                self.compile_while()
-            elif peek_token == "do":
-                self.compile_do()
-            elif peek_token == "return":
-                self.compile_return()
-            
-            self.tokenizer.buffer_token()
-
-    def compile_let(self):
+        for statement in statements:
+            if isinstance(statement, LetStatement):
+                self.compile_let(statement)
+            elif isinstance(statement, IfStatement):
+                self.compile_if(statement)
+            elif isinstance(statement, WhileStatement):
+                self.compile_while(statement)
+            elif isinstance(statement, DoStatement):
+                self.compile_do(statement)
+            elif isinstance(statement, ReturnStatement):
+                self.compile_return(statement)
+
+    def compile_let(self, let: LetStatement):
         """
         Compiles a 'let' statement (variable assignment).
         """
-        self.tokenizer.use_token() # let
-        
-        name_token = self.tokenizer.use_token() # varName
-        symbol_name = name_token.get_value()
-        symbol_kind = self.symbol_table.get_kind_of(symbol_name)
-        symbol_idx = self.symbol_table.get_index_of(symbol_name)
-
-        is_array = False
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "[": # evaluate the memory address of this array offset
-            is_array = True
+        symbol_kind = self.symbol_table.get_kind_of(let.name)
+        symbol_idx = self.symbol_table.get_index_of(let.name)
+
+        if let.index is not None: # evaluate the memory address of this array offset
             self.vm_writer.write_push(self._kind_to_segment(symbol_kind), symbol_idx)
-            self.tokenizer.use_token() # [
-            self.compile_expression()
-            self.tokenizer.use_token() # ]
+            self.compile_expression(let.index)
             self.vm_writer.write_arithmetic("add")
 
-        self.tokenizer.use_token() # =
-        self.compile_expression()
-        
-        if is_array:
+        self.compile_expression(let.value)
+
+        if let.index is not None:
             self.vm_writer.write_pop("temp", 0)
             self.vm_writer.write_pop("pointer", 1)
             self.vm_writer.write_push("temp", 0)
@@ -197,246 +164,230 @@ class CompilationEngine:
         else:
             self.vm_writer.write_pop(self._kind_to_segment(symbol_kind), symbol_idx)
 
-        self.tokenizer.use_token() # ;
-
-    def compile_if(self):
+    def compile_if(self, if_statement: IfStatement):
         """
         Compiles an 'if' statement with optional 'else' block.
         """
-        self.tokenizer.use_token() # if
-        
-        self.tokenizer.use_token() # (
-        self.compile_expression()
-        self.tokenizer.use_token() # )
+        self.compile_expression(if_statement.condition)
 
         # get the ~ of the eval expression
         self.vm_writer.write_arithmetic("not")
         if_count = next(self.if_count)
-        
+
         # if the ~expression is true => expression is false => go to the if-false branch (which could be an else, or nothing)
         self.vm_writer.write_if_goto(f"IF_FALSE{if_count}")
-        self.tokenizer.use_token() # {
-        self.compile_statements()
-        self.tokenizer.use_token() # }
+        self.compile_statements(if_statement.statements)
         self.vm_writer.write_goto(f"END_IF{if_count}")
 
         self.vm_writer.write_label(f"IF_FALSE{if_count}")
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "else":
-            self.tokenizer.use_token() # else
-            self.tokenizer.use_token() # {
-            self.compile_statements()
-            self.tokenizer.use_token() # }
-        
+        if if_statement.else_statements is not None:
+            self.compile_statements(if_statement.else_statements)
+
         self.vm_writer.write_label(f"END_IF{if_count}")
 
-    def compile_while(self):
+    def compile_while(self, while_statement: WhileStatement):
         """
         Compiles a 'while' statement.
         """
-        self.tokenizer.use_token() # while
-
         while_count = next(self.while_count)
         self.vm_writer.write_label(f"WHILE_TRUE{while_count}")
 
-        self.tokenizer.use_token() # (
-        self.compile_expression()
-        self.tokenizer.use_token() # )
+        self.compile_expression(while_statement.condition)
 
         # get the ~ of the eval expression
         self.vm_writer.write_arithmetic("not")
         # if the ~expression is true => expression is false => exit while loop
         self.vm_writer.write_if_goto(f"END_WHILE{while_count}")
 
-        self.tokenizer.use_token() # {
-        self.compile_statements()
-        self.tokenizer.use_token() # }
+        self.compile_statements(while_statement.statements)
 
         # go back to the while loop
         self.vm_writer.write_goto(f"WHILE_TRUE{while_count}")
 
         self.vm_writer.write_label(f"END_WHILE{while_count}")
 
-    def compile_do(self):
+    def compile_do(self, do: DoStatement):
         """
         Compiles a 'do' statement (subroutine call).
         """
-        self.tokenizer.use_token() # do
-
-        first_token = self.tokenizer.use_token() # subroutineName | (className | varName)
-        self.compile_subroutine_call(first_token)
-        self.tokenizer.use_token() # ;
+        self.compile_subroutine_call(do.call)
         self.vm_writer.write_pop("temp", 0) # discard the unused returned value
 
-    def compile_return(self):
+    def compile_return(self, return_statement: ReturnStatement):
         """
         Compiles a 'return' statement.
         """
-        self.tokenizer.use_token() # return
-        
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() != ";":
-            self.compile_expression()
+        if return_statement.value is not None:
+            self.compile_expression(return_statement.value)
         else: # no return value
             self.vm_writer.write_push("constant", 0)
-        
-        self.tokenizer.use_token() # ;
+
         self.vm_writer.write_return()
 
-    def compile_expression(self):
-        """
-        Compiles an expression.
-        """
-        self.compile_term() # an expression always starts with at least 1 term
-
-        self.tokenizer.buffer_token()
-        while self.tokenizer.peek_token() in ("+", "-", "*", "/", "&amp;", "|", "&lt;", "&gt;", "="):
-            op_token = self.tokenizer.use_token() # op
-            self.compile_term()
-
-            op_value = op_token.get_value()
-            if op_value == "+":
-                self.vm_writer.write_arithmetic("add")
-            elif op_value == "-":
-                self.vm_writer.write_arithmetic("sub")
-            elif op_value == "*":
-                self.vm_writer.write_call("Math.multiply", 2)
-            elif op_value == "/":
-                self.vm_writer.write_call("Math.divide", 2)
-            elif op_value == "&amp;":
-                self.vm_writer.write_arithmetic("and")
-            elif op_value == "|":
-                self.vm_writer.write_arithmetic("or")
-            elif op_value == "&lt;":
-                self.vm_writer.write_arithmetic("lt")
-            elif op_value == "&gt;":
-                self.vm_writer.write_arithmetic("gt")
-            elif op_value == "=":
-                self.vm_writer.write_arithmetic("eq")
-            
-            self.tokenizer.buffer_token()
-
-    def compile_term(self):
-        """
-        Compiles a term (a part of an expression).
-        """
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == "(": # (expression)
-            self.tokenizer.use_token() # (
-            self.compile_expression()
-            self.tokenizer.use_token() # )
-        elif self.tokenizer.peek_token() in ("-", "~"): # unaryOp
-            op_token = self.tokenizer.use_token() # - | ~
-            self.compile_term()
-
-            op_value = op_token.get_value()
-            if op_value == "-":
+    def compile_expression(self, expression: Expression):
+        """
+        Compiles an expression, or a term.
+        """
+        if isinstance(expression, BinaryOp):
+            if self.optimize and expression.op == "*" and constant_value(expression.right) is not None:
+                self.compile_multiply_constant(expression.left, constant_value(expression.right))
+                return
+
+            self.compile_expression(expression.left)
+            self.compile_expression(expression.right)
+
+            if expression.op in _BINARY_CALLS:
+                self.vm_writer.write_call(_BINARY_CALLS[expression.op], 2)
+            else:
+                self.vm_writer.write_arithmetic(_BINARY_COMMANDS[expression.op])
+        elif isinstance(expression, Parenthesized):
+            self.compile_expression(expression.expression)
+        elif isinstance(expression, UnaryOp):
+            self.compile_expression(expression.term)
+            self.vm_writer.write_arithmetic("neg" if expression.op == "-" else "not")
+        elif isinstance(expression, IntegerConstant):
+            self.compile_constant(expression.value)
+        elif isinstance(expression, StringConstant):
+            if self.intern_strings:
+                self.compile_interned_string(expression.value)
+            else:
+                self.compile_string(expression.value)
+        elif isinstance(expression, KeywordConstant): # true false null this
+            if expression.value == "true":
+                self.vm_writer.write_push("constant", "1")
                 self.vm_writer.write_arithmetic("neg")
-            elif op_value == "~":
-                self.vm_writer.write_arithmetic("not")
-        else: # intConst | strConst | keywordConst | varName | varName[expression] | subroutineCall
-            term_token = self.tokenizer.use_token() # intConst | strConst | keywordConst | varName
-            term_type =  term_token.get_type()
-            term_value = term_token.get_value()
-
-            if term_type == "INT_CONST":
-                self.vm_writer.write_push("constant", term_value)
-            elif term_type == "STRING_CONST":
-                # call String.new with 1 arg, the length of the strin
-                self.vm_writer.write_push("constant", len(term_value))
-                self.vm_writer.write_call("String.new", 1)
-                for char in term_value:
-                    self.vm_writer.write_push("constant", ord(char))
-                    self.vm_writer.write_call("String.appendChar", 2)
-            elif term_type == "KEYWORD": # true false null this
-                if term_value == "true":
-                    self.vm_writer.write_push("constant", "1")
-                    self.vm_writer.write_arithmetic("neg")
-                elif term_value == "false" or term_value == "null":
-                    self.vm_writer.write_push("constant", "0")
-                elif term_value == "this":
-                    self.vm_writer.write_push("pointer", "0")
-            else: # "IDENTIFIER"
-                kind = self.symbol_table.get_kind_of(term_value)
-                idx = self.symbol_table.get_index_of(term_value)
-                
-                self.tokenizer.buffer_token()
-                if self.tokenizer.peek_token() == "[": # varName[expression]
-                    self.vm_writer.write_push(self._kind_to_segment(kind), idx)
-                    self.tokenizer.use_token() # [
-                    self.compile_expression()
-                    self.tokenizer.use_token() # ]
-                    self.vm_writer.write_arithmetic("add")
-                    self.vm_writer.write_pop("pointer", 1)
-                    self.vm_writer.write_push("that", 0)
-                elif self.tokenizer.peek_token() in ("(", "."): # function call
-                    self.compile_subroutine_call(term_token)
-                else: # simple varName
-                    self.vm_writer.write_push(self._kind_to_segment(kind), idx)
-
-    def compile_subroutine_call(self, first_token: JackToken):
+            elif expression.value == "false" or expression.value == "null":
+                self.vm_writer.write_push("constant", "0")
+            elif expression.value == "this":
+                self.vm_writer.write_push("pointer", "0")
+        elif isinstance(expression, VarName):
+            kind = self.symbol_table.get_kind_of(expression.name)
+            idx = self.symbol_table.get_index_of(expression.name)
+            self.vm_writer.write_push(self._kind_to_segment(kind), idx)
+        elif isinstance(expression, ArrayAccess):
+            kind = self.symbol_table.get_kind_of(expression.name)
+            idx = self.symbol_table.get_index_of(expression.name)
+            self.vm_writer.write_push(self._kind_to_segment(kind), idx)
+            self.compile_expression(expression.index)
+            self.vm_writer.write_arithmetic("add")
+            self.vm_writer.write_pop("pointer", 1)
+            self.vm_writer.write_push("that", 0)
+        elif isinstance(expression, SubroutineCall):
+            self.compile_subroutine_call(expression)
+
+    def compile_constant(self, value: int):
+        """
+        Compiles an integer constant. Folded constants can be negative, which `push constant` can't take.
+        """
+        if value >= 0:
+            self.vm_writer.write_push("constant", value)
+        elif value == -32768: # its negation doesn't fit either
+            self.vm_writer.write_push("constant", 32767)
+            self.vm_writer.write_arithmetic("not")
+        else:
+            self.vm_writer.write_push("constant", -value)
+            self.vm_writer.write_arithmetic("neg")
+
+    def compile_multiply_constant(self, expression: Expression, value: int):
+        """
+        Compiles the multiplication of an expression by a constant without calling Math.multiply when possible.
+
+        Multiplying by ±2^k doubles the expression k times, adding it to itself (and negates it for -2^k). The
+        value being doubled is kept in temp 1 in between, as it must only be evaluated once. Sums wrap around
+        like Math.multiply's, so the result is the same for every operand. Multiplying by 0 still evaluates the
+        expression, for the calls in it.
+        """
+        magnitude = -value if value < 0 else value
+        if value == -32768: # -2^15 == 2^15 in 16 bits
+            magnitude = 32768
+
+        if value == 0:
+            self.compile_expression(expression)
+            self.vm_writer.write_pop("temp", 1)
+            self.vm_writer.write_push("constant", 0)
+            return
+        if magnitude & (magnitude - 1): # not a power of two
+            self.compile_expression(expression)
+            self.compile_constant(value)
+            self.vm_writer.write_call("Math.multiply", 2)
+            return
+
+        self.compile_expression(expression)
+        for _ in range(magnitude.bit_length() - 1):
+            self.vm_writer.write_pop("temp", 1)
+            self.vm_writer.write_push("temp", 1)
+            self.vm_writer.write_push("temp", 1)
+            self.vm_writer.write_arithmetic("add")
+        if value < 0 and value != -32768:
+            self.vm_writer.write_arithmetic("neg")
+
+    def compile_string(self, value: str):
+        """
+        Compiles a string literal into a new String.
+        """
+        # call String.new with 1 arg, the length of the string
+        self.vm_writer.write_push("constant", len(value))
+        self.vm_writer.write_call("String.new", 1)
+        for char in value:
+            self.vm_writer.write_push("constant", ord(char))
+            self.vm_writer.write_call("String.appendChar", 2)
+
+    def compile_interned_string(self, value: str):
+        """
+        Compiles a string literal into a String shared by all the occurrences of the literal in the class.
+
+        The String is built the first time one of them is evaluated, and kept in a static variable of its own,
+        numbered after the ones the class declares. Statics start out as 0 and a String is never at address 0,
+        so a nonzero static means the String is already built. As the String is shared, the program must
+        neither modify nor dispose of it.
+        """
+        slot = self.string_slots.get(value)
+        if slot is None:
+            slot = self.symbol_table.var_count("static") + len(self.string_slots)
+            self.string_slots[value] = slot
+        string_count = next(self.string_count)
+
+        self.vm_writer.write_push("static", slot)
+        self.vm_writer.write_if_goto(f"STRING_READY{string_count}")
+        self.compile_string(value)
+        self.vm_writer.write_pop("static", slot)
+        self.vm_writer.write_label(f"STRING_READY{string_count}")
+        self.vm_writer.write_push("static", slot)
+
+    def compile_subroutine_call(self, call: SubroutineCall):
         """
         Compiles a subroutine call, including method or function calls.
         subroutineName(expressionList)
         varName.subroutineName(expressionList)
-        className.subroutineName(exprsesionList)
-        
-        Args:
-            first_token (JackToken): the first token of this call: subroutineName | className | varName
+        className.subroutineName(expressionList)
         """
-        first_symbol_name = first_token.get_value()
         is_method = False
 
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() == ".":
-            self.tokenizer.use_token() # .
-            second_token = self.tokenizer.use_token() # subroutineName
-            
+        if call.receiver is not None:
             # this can potentially be the class name of an object
             # or just None if the symbol name itself is a class name
-            first_symbol_type = self.symbol_table.get_type_of(first_symbol_name)
+            receiver_type = self.symbol_table.get_type_of(call.receiver)
 
-            if first_symbol_type not in (None, "int", "char", "boolean"): # method call to object of another class
+            if receiver_type not in (None, "int", "char", "boolean"): # method call to object of another class
                 is_method = True
-                first_symbol_kind = self.symbol_table.get_kind_of(first_symbol_name)
-                first_symbol_idx = self.symbol_table.get_index_of(first_symbol_name)
-                self.vm_writer.write_push(self._kind_to_segment(first_symbol_kind), first_symbol_idx)
-                function_name = f"{first_symbol_type}.{second_token.get_value()}"
+                receiver_kind = self.symbol_table.get_kind_of(call.receiver)
+                receiver_idx = self.symbol_table.get_index_of(call.receiver)
+                self.vm_writer.write_push(self._kind_to_segment(receiver_kind), receiver_idx)
+                function_name = f"{receiver_type}.{call.name}"
             else: # function call to another class
-                function_name = f"{first_symbol_name}.{second_token.get_value()}"
+                function_name = f"{call.receiver}.{call.name}"
         else: # method call to object of this very class
             is_method = True
             self.vm_writer.write_push("pointer", 0)
-            function_name = f"{self.class_name}.{first_symbol_name}"
+            function_name = f"{self.class_name}.{call.name}"
 
-        self.tokenizer.use_token() # (
-        num_args = self.compile_expression_list()
-        self.tokenizer.use_token() # )
+        for argument in call.arguments:
+            self.compile_expression(argument)
 
         if is_method:
-            self.vm_writer.write_call(function_name, num_args + 1)
+            self.vm_writer.write_call(function_name, len(call.arguments) + 1)
         else:
-            self.vm_writer.write_call(function_name, num_args)
-
-    def compile_expression_list(self) -> int:
-        """
-        Compiles an expression list (used in function calls).
-        Returns the number of expressions in the list.
-        """
-        count = 0 # number of expressions separated by ,
-        self.tokenizer.buffer_token()
-        if self.tokenizer.peek_token() != ")":
-            self.compile_expression()
-            count += 1
-
-            self.tokenizer.buffer_token()
-            while self.tokenizer.peek_token() == ",":
-                self.tokenizer.use_token() # ,
-                self.compile_expression()
-                count += 1
-                self.tokenizer.buffer_token()
-
-        return count
+            self.vm_writer.write_call(function_name, len(call.arguments))
 
     def _kind_to_segment(self, kind: SymbolKind) ->  Segment:
         """
@@ -449,4 +400,4 @@ class CompilationEngine:
         if kind == "arg":
             return "argument"
         if kind == "var":
-            return "local"
\ No newline at end of file
+            return "local"
@@ -0,0 +1,195 @@
+from typing import List, Optional, Tuple, Union
+
+# the Jack syntax tree built by `JackParser`, and read by both the VM code generator and the XML analyzer of project 10
+# only what can't be inferred from the grammar is kept: punctuation is left out, as every emitter can put it back
+
+class Node:
+    """
+    Base class of the syntax tree nodes. Nodes only hold their fields, in slots, so that a whole class stays compact.
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+# terms
+
+class IntegerConstant(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+class StringConstant(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+class KeywordConstant(Node):
+    """
+    true, false, null or this.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+class VarName(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+class ArrayAccess(Node):
+    """
+    name[index]
+    """
+    __slots__ = ("name", "index")
+
+    def __init__(self, name: str, index: "Expression"):
+        self.name = name
+        self.index = index
+
+class SubroutineCall(Node):
+    """
+    name(arguments), or receiver.name(arguments) where the receiver is a class or a variable name.
+    """
+    __slots__ = ("receiver", "name", "arguments")
+
+    def __init__(self, receiver: Optional[str], name: str, arguments: List["Expression"]):
+        self.receiver = receiver
+        self.name = name
+        self.arguments = arguments
+
+class Parenthesized(Node):
+    """
+    (expression), kept as a node of its own since Jack has no operator precedence: it's the only grouping there is.
+    """
+    __slots__ = ("expression",)
+
+    def __init__(self, expression: "Expression"):
+        self.expression = expression
+
+class UnaryOp(Node):
+    """
+    - term | ~ term
+    """
+    __slots__ = ("op", "term")
+
+    def __init__(self, op: str, term: "Term"):
+        self.op = op
+        self.term = term
+
+Term = Union[IntegerConstant, StringConstant, KeywordConstant, VarName, ArrayAccess, SubroutineCall, Parenthesized, UnaryOp]
+
+# expressions
+
+class BinaryOp(Node):
+    """
+    left op right. Jack evaluates operators left to right, so the left operand is any expression and the right
+    operand is always a term: `a + b * c` is `BinaryOp("*", BinaryOp("+", a, b), c)`.
+    """
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: "Expression", right: Term):
+        self.op = op
+        self.left = left
+        self.right = right
+
+Expression = Union[Term, BinaryOp]
+
+# statements
+
+class LetStatement(Node):
+    """
+    let name = value; or let name[index] = value;
+    """
+    __slots__ = ("name", "index", "value")
+
+    def __init__(self, name: str, index: Optional[Expression], value: Expression):
+        self.name = name
+        self.index = index
+        self.value = value
+
+class IfStatement(Node):
+    """
+    if (condition) {statements} else {else_statements}. `else_statements` is None without an else block.
+    """
+    __slots__ = ("condition", "statements", "else_statements")
+
+    def __init__(self, condition: Expression, statements: List["Statement"], else_statements: Optional[List["Statement"]]):
+        self.condition = condition
+        self.statements = statements
+        self.else_statements = else_statements
+
+class WhileStatement(Node):
+    __slots__ = ("condition", "statements")
+
+    def __init__(self, condition: Expression, statements: List["Statement"]):
+        self.condition = condition
+        self.statements = statements
+
+class DoStatement(Node):
+    __slots__ = ("call",)
+
+    def __init__(self, call: SubroutineCall):
+        self.call = call
+
+class ReturnStatement(Node):
+    """
+    return value; where `value` is None for a bare return.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: Optional[Expression]):
+        self.value = value
+
+Statement = Union[LetStatement, IfStatement, WhileStatement, DoStatement, ReturnStatement]
+
+# declarations
+
+class ClassVarDec(Node):
+    """
+    static|field type name, name, ...;
+    """
+    __slots__ = ("kind", "type", "names")
+
+    def __init__(self, kind: str, type: str, names: List[str]):
+        self.kind = kind
+        self.type = type
+        self.names = names
+
+class VarDec(Node):
+    """
+    var type name, name, ...;
+    """
+    __slots__ = ("type", "names")
+
+    def __init__(self, type: str, names: List[str]):
+        self.type = type
+        self.names = names
+
+class SubroutineDec(Node):
+    """
+    constructor|function|method return_type name(type name, ...) {var_decs statements}
+    """
+    __slots__ = ("kind", "return_type", "name", "parameters", "var_decs", "statements")
+
+    def __init__(self, kind: str, return_type: str, name: str, parameters: List[Tuple[str, str]],
+                 var_decs: List[VarDec], statements: List[Statement]):
+        self.kind = kind
+        self.return_type = return_type
+        self.name = name
+        self.parameters = parameters
+        self.var_decs = var_decs
+        self.statements = statements
+
+class Class(Node):
+    __slots__ = ("name", "class_var_decs", "subroutine_decs")
+
+    def __init__(self, name: str, class_var_decs: List[ClassVarDec], subroutine_decs: List[SubroutineDec]):
+        self.name = name
+        self.class_var_decs = class_var_decs
+        self.subroutine_decs = subroutine_decs
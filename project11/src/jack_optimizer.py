@@ -0,0 +1,161 @@
+from typing import List, Optional
+from jack_ast import (Class, Statement, LetStatement, IfStatement, WhileStatement, DoStatement,
+                      ReturnStatement, Expression, BinaryOp, UnaryOp, Parenthesized, IntegerConstant, KeywordConstant,
+                      ArrayAccess, SubroutineCall, Node)
+
+# constant folding, with the same 16-bit semantics as the compiled code
+_UNARY = {
+    "-": lambda x: _wrap(-x),
+    "~": lambda x: ~x
+}
+_BINARY = {
+    "+": lambda x, y: _wrap(x + y),
+    "-": lambda x, y: _wrap(x - y),
+    "*": lambda x, y: _wrap(x * y), # Math.multiply adds up all 16 bits, so it wraps around like this too
+    "&": lambda x, y: x & y,
+    "|": lambda x, y: x | y,
+    "<": lambda x, y: -1 if x < y else 0,
+    ">": lambda x, y: -1 if x > y else 0,
+    "=": lambda x, y: -1 if x == y else 0
+}
+# `/` is never folded: Math.divide isn't exact for every operand, and its results depend on the OS it runs on
+_COMPARISONS = ("<", ">", "=")
+# keyword constant -> value
+_KEYWORD_VALUES = {"true": -1, "false": 0, "null": 0}
+
+
+def _wrap(value: int) -> int:
+    """
+    Wraps an integer around to the signed 16-bit range, like the Hack ALU does.
+    """
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+def fold_constants(class_node: Class) -> Class:
+    """
+    Folds the constant subexpressions of a class, in place.
+
+    Operators whose operands are all constant are replaced by their result, e.g. `16 * 32` becomes `512` and
+    `~false` becomes `-1`. Multiplications by 1 are dropped, and multiplications by 0 become 0 when the other
+    operand has no calls in it. Constants multiplying a variable operand are moved to the right, where
+    `CompilationEngine` turns powers of two into additions.
+
+    Folded constants may be negative, which `IntegerConstant` never is straight out of the parser.
+    Comparisons are only folded when the difference of their operands fits in 16 bits, as the translated
+    `lt`, `gt` and `eq` only look at the sign of the wrapped difference.
+
+    Args:
+        class_node (Class): The syntax tree of the class.
+
+    Returns:
+        Class: The same tree.
+    """
+    for subroutine_dec in class_node.subroutine_decs:
+        _fold_statements(subroutine_dec.statements)
+
+    return class_node
+
+
+def _fold_statements(statements: List[Statement]) -> None:
+    for statement in statements:
+        if isinstance(statement, LetStatement):
+            if statement.index is not None:
+                statement.index = fold_expression(statement.index)
+            statement.value = fold_expression(statement.value)
+        elif isinstance(statement, IfStatement):
+            statement.condition = fold_expression(statement.condition)
+            _fold_statements(statement.statements)
+            if statement.else_statements is not None:
+                _fold_statements(statement.else_statements)
+        elif isinstance(statement, WhileStatement):
+            statement.condition = fold_expression(statement.condition)
+            _fold_statements(statement.statements)
+        elif isinstance(statement, DoStatement):
+            statement.call.arguments = [fold_expression(argument) for argument in statement.call.arguments]
+        elif isinstance(statement, ReturnStatement) and statement.value is not None:
+            statement.value = fold_expression(statement.value)
+
+
+def fold_expression(expression: Expression) -> Expression:
+    """
+    Folds the constant subexpressions of an expression.
+
+    Args:
+        expression (Expression): The expression, which may be rewritten in place.
+
+    Returns:
+        Expression: The folded expression.
+    """
+    if isinstance(expression, BinaryOp):
+        left = fold_expression(expression.left)
+        right = fold_expression(expression.right)
+        x, y = constant_value(left), constant_value(right)
+        op = expression.op
+
+        if x is not None and y is not None and op in _BINARY:
+            if op not in _COMPARISONS or -0x8000 <= x - y <= 0x7FFF:
+                return IntegerConstant(_BINARY[op](x, y))
+
+        if op == "*":
+            if x is not None: # c * e == e * c
+                left, right, x, y = right, left, y, x
+            if y == 1:
+                return left
+            if y == 0 and not _has_call(left):
+                return IntegerConstant(0)
+
+        expression.left = left
+        expression.right = right
+        return expression
+
+    if isinstance(expression, UnaryOp):
+        term = fold_expression(expression.term)
+        value = constant_value(term)
+        if value is not None:
+            return IntegerConstant(_UNARY[expression.op](value))
+
+        expression.term = term
+        return expression
+
+    if isinstance(expression, Parenthesized):
+        inner = fold_expression(expression.expression)
+        if isinstance(inner, IntegerConstant):
+            return inner
+
+        expression.expression = inner
+        return expression
+
+    if isinstance(expression, ArrayAccess):
+        expression.index = fold_expression(expression.index)
+    elif isinstance(expression, SubroutineCall):
+        expression.arguments = [fold_expression(argument) for argument in expression.arguments]
+
+    return expression
+
+
+def constant_value(expression: Expression) -> Optional[int]:
+    """
+    Retrieves the value of a constant term, or None if it isn't one.
+    """
+    if isinstance(expression, IntegerConstant):
+        return expression.value
+    if isinstance(expression, KeywordConstant):
+        return _KEYWORD_VALUES.get(expression.value) # None for this
+    return None
+
+
+def _has_call(node: Node) -> bool:
+    """
+    Checks whether evaluating an expression calls any subroutine, which could have side effects.
+    """
+    if isinstance(node, SubroutineCall):
+        return True
+    if isinstance(node, BinaryOp):
+        return _has_call(node.left) or _has_call(node.right)
+    if isinstance(node, UnaryOp):
+        return _has_call(node.term)
+    if isinstance(node, Parenthesized):
+        return _has_call(node.expression)
+    if isinstance(node, ArrayAccess):
+        return _has_call(node.index)
+    return False
@@ -0,0 +1,322 @@
+from typing import List, Optional, Tuple
+from jack_tokenizer import JackTokenizer
+from jack_ast import (Class, ClassVarDec, SubroutineDec, VarDec, Statement, LetStatement, IfStatement, WhileStatement,
+                      DoStatement, ReturnStatement, Expression, Term, BinaryOp, UnaryOp, Parenthesized, IntegerConstant,
+                      StringConstant, KeywordConstant, VarName, ArrayAccess, SubroutineCall)
+
+class JackParser:
+    """
+    Parses Jack source code into a syntax tree, by recursive descent over the tokens.
+
+    The tree is all the code generators see of the source: the VM code of project 11 and the XML of project 10
+    are both emitted from it, and passes can rewrite it in between.
+    """
+    def __init__(self, tokenizer: JackTokenizer):
+        """
+        Initializes the JackParser with the tokenizer of a source file.
+
+        Args:
+            tokenizer (JackTokenizer): Tokenizer of the Jack source code.
+        """
+        self.tokenizer = tokenizer
+
+    def parse_class(self) -> Class:
+        """
+        Parses a class declaration, including class variables and subroutines.
+        """
+        self.tokenizer.use_token() # class
+        class_name = self.tokenizer.use_token().get_value() # class name
+        self.tokenizer.use_token() # {
+
+        class_var_decs = []
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() in ("static", "field"):
+            class_var_decs.append(self.parse_class_var_dec())
+            self.tokenizer.buffer_token()
+
+        subroutine_decs = []
+        while self.tokenizer.peek_token() in ("constructor", "function", "method"):
+            subroutine_decs.append(self.parse_subroutine_dec())
+            self.tokenizer.buffer_token()
+
+        self.tokenizer.use_token() # }
+        return Class(class_name, class_var_decs, subroutine_decs)
+
+    def parse_class_var_dec(self) -> ClassVarDec:
+        """
+        Parses a class variable declaration (static or field).
+        """
+        kind = self.tokenizer.use_token().get_value() # static | field
+        type = self.tokenizer.use_token().get_value() # int | char | boolean | className
+        names = [self.tokenizer.use_token().get_value()] # varName
+
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() == ",":
+            self.tokenizer.use_token() # ,
+            names.append(self.tokenizer.use_token().get_value()) # varName
+            self.tokenizer.buffer_token()
+
+        self.tokenizer.use_token() # ;
+        return ClassVarDec(kind, type, names)
+
+    def parse_subroutine_dec(self) -> SubroutineDec:
+        """
+        Parses a subroutine declaration (constructor, function, method).
+        """
+        kind = self.tokenizer.use_token().get_value() # constructor | function | method
+        return_type = self.tokenizer.use_token().get_value() # void | type
+        name = self.tokenizer.use_token().get_value() # subroutine name
+
+        self.tokenizer.use_token() # (
+        parameters = self.parse_parameter_list()
+        self.tokenizer.use_token() # )
+
+        # subroutine body
+        self.tokenizer.use_token() # {
+        var_decs = self.parse_var_decs()
+        statements = self.parse_statements()
+        self.tokenizer.use_token() # }
+
+        return SubroutineDec(kind, return_type, name, parameters, var_decs, statements)
+
+    def parse_parameter_list(self) -> List[Tuple[str, str]]:
+        """
+        Parses a list of parameters for a subroutine, into (type, name) pairs.
+        """
+        parameters = []
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() != ")":
+            type = self.tokenizer.use_token().get_value() # type
+            parameters.append((type, self.tokenizer.use_token().get_value())) # varName
+
+            self.tokenizer.buffer_token()
+            while self.tokenizer.peek_token() == ",":
+                self.tokenizer.use_token() # ,
+                type = self.tokenizer.use_token().get_value() # type
+                parameters.append((type, self.tokenizer.use_token().get_value())) # varName
+                self.tokenizer.buffer_token()
+
+        return parameters
+
+    def parse_var_decs(self) -> List[VarDec]:
+        """
+        Parses the local variable declarations at the start of a subroutine body.
+        """
+        var_decs = []
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() == "var":
+            self.tokenizer.use_token() # var
+            type = self.tokenizer.use_token().get_value() # type
+            names = [self.tokenizer.use_token().get_value()] # varName
+
+            self.tokenizer.buffer_token()
+            while self.tokenizer.peek_token() == ",":
+                self.tokenizer.use_token() # ,
+                names.append(self.tokenizer.use_token().get_value()) # varName
+                self.tokenizer.buffer_token()
+
+            self.tokenizer.use_token() # ;
+            var_decs.append(VarDec(type, names))
+            self.tokenizer.buffer_token()
+
+        return var_decs
+
+    def parse_statements(self) -> List[Statement]:
+        """
+        Parses a sequence of statements.
+        """
+        statements = []
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() in ("let", "if", "while", "do", "return"):
+            peek_token = self.tokenizer.peek_token()
+
+            if peek_token == "let":
+                statements.append(self.parse_let())
+            elif peek_token == "if":
+                statements.append(self.parse_if())
+            elif peek_token == "while":
+                statements.append(self.parse_while())
+            elif peek_token == "do":
+                statements.append(self.parse_do())
+            elif peek_token == "return":
+                statements.append(self.parse_return())
+
+            self.tokenizer.buffer_token()
+
+        return statements
+
+    def parse_let(self) -> LetStatement:
+        """
+        Parses a 'let' statement (variable assignment).
+        """
+        self.tokenizer.use_token() # let
+        name = self.tokenizer.use_token().get_value() # varName
+
+        index = None
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() == "[":
+            self.tokenizer.use_token() # [
+            index = self.parse_expression()
+            self.tokenizer.use_token() # ]
+
+        self.tokenizer.use_token() # =
+        value = self.parse_expression()
+        self.tokenizer.use_token() # ;
+
+        return LetStatement(name, index, value)
+
+    def parse_if(self) -> IfStatement:
+        """
+        Parses an 'if' statement with optional 'else' block.
+        """
+        self.tokenizer.use_token() # if
+        self.tokenizer.use_token() # (
+        condition = self.parse_expression()
+        self.tokenizer.use_token() # )
+
+        self.tokenizer.use_token() # {
+        statements = self.parse_statements()
+        self.tokenizer.use_token() # }
+
+        else_statements = None
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() == "else":
+            self.tokenizer.use_token() # else
+            self.tokenizer.use_token() # {
+            else_statements = self.parse_statements()
+            self.tokenizer.use_token() # }
+
+        return IfStatement(condition, statements, else_statements)
+
+    def parse_while(self) -> WhileStatement:
+        """
+        Parses a 'while' statement.
+        """
+        self.tokenizer.use_token() # while
+        self.tokenizer.use_token() # (
+        condition = self.parse_expression()
+        self.tokenizer.use_token() # )
+
+        self.tokenizer.use_token() # {
+        statements = self.parse_statements()
+        self.tokenizer.use_token() # }
+
+        return WhileStatement(condition, statements)
+
+    def parse_do(self) -> DoStatement:
+        """
+        Parses a 'do' statement (subroutine call).
+        """
+        self.tokenizer.use_token() # do
+        first_name = self.tokenizer.use_token().get_value() # subroutineName | (className | varName)
+        call = self.parse_subroutine_call(first_name)
+        self.tokenizer.use_token() # ;
+
+        return DoStatement(call)
+
+    def parse_return(self) -> ReturnStatement:
+        """
+        Parses a 'return' statement.
+        """
+        self.tokenizer.use_token() # return
+
+        value = None
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() != ";":
+            value = self.parse_expression()
+
+        self.tokenizer.use_token() # ;
+        return ReturnStatement(value)
+
+    def parse_expression(self) -> Expression:
+        """
+        Parses an expression. Operators are applied left to right, as Jack has no precedence.
+        """
+        expression = self.parse_term() # an expression always starts with at least 1 term
+
+        self.tokenizer.buffer_token()
+        while self.tokenizer.peek_token() in ("+", "-", "*", "/", "&", "|", "<", ">", "="):
+            op = self.tokenizer.use_token().get_value() # op
+            expression = BinaryOp(op, expression, self.parse_term())
+            self.tokenizer.buffer_token()
+
+        return expression
+
+    def parse_term(self) -> Term:
+        """
+        Parses a term (a part of an expression).
+        """
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() == "(": # (expression)
+            self.tokenizer.use_token() # (
+            expression = self.parse_expression()
+            self.tokenizer.use_token() # )
+            return Parenthesized(expression)
+
+        if self.tokenizer.peek_token() in ("-", "~"): # unaryOp
+            op = self.tokenizer.use_token().get_value() # - | ~
+            return UnaryOp(op, self.parse_term())
+
+        # intConst | strConst | keywordConst | varName | varName[expression] | subroutineCall
+        term_token = self.tokenizer.use_token()
+        term_type = term_token.get_type()
+        term_value = term_token.get_value()
+
+        if term_type == "INT_CONST":
+            return IntegerConstant(term_value)
+        if term_type == "STRING_CONST":
+            return StringConstant(term_value)
+        if term_type == "KEYWORD": # true false null this
+            return KeywordConstant(term_value)
+
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() == "[": # varName[expression]
+            self.tokenizer.use_token() # [
+            index = self.parse_expression()
+            self.tokenizer.use_token() # ]
+            return ArrayAccess(term_value, index)
+        if self.tokenizer.peek_token() in ("(", "."): # subroutine call
+            return self.parse_subroutine_call(term_value)
+        return VarName(term_value)
+
+    def parse_subroutine_call(self, first_name: str) -> SubroutineCall:
+        """
+        Parses a subroutine call, once its first name has been consumed.
+        subroutineName(expressionList)
+        varName.subroutineName(expressionList)
+        className.subroutineName(expressionList)
+
+        Args:
+            first_name (str): the first name of this call: subroutineName | className | varName
+        """
+        receiver: Optional[str] = None
+        name = first_name
+
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() == ".":
+            self.tokenizer.use_token() # .
+            receiver = first_name
+            name = self.tokenizer.use_token().get_value() # subroutineName
+
+        self.tokenizer.use_token() # (
+        arguments = self.parse_expression_list()
+        self.tokenizer.use_token() # )
+
+        return SubroutineCall(receiver, name, arguments)
+
+    def parse_expression_list(self) -> List[Expression]:
+        """
+        Parses an expression list (the arguments of a call).
+        """
+        expressions = []
+        self.tokenizer.buffer_token()
+        if self.tokenizer.peek_token() != ")":
+            expressions.append(self.parse_expression())
+
+            self.tokenizer.buffer_token()
+            while self.tokenizer.peek_token() == ",":
+                self.tokenizer.use_token() # ,
+                expressions.append(self.parse_expression())
+                self.tokenizer.buffer_token()
+
+        return expressions
@@ -1,9 +1,40 @@
-import re
+import re, sys, mmap
 from collections import deque
-from typing import Union, Iterator, TextIO, Literal, Deque
+from typing import Iterator, TextIO, Literal, Deque, Optional, Tuple
 
 TokenType = Literal["KEYWORD", "SYMBOL", "INT_CONST", "STRING_CONST", "IDENTIFIER"]
 
+# one alternative per token type, named after it so that `match.lastgroup` is the type of the token
+# comments are matched like tokens and skipped, so that the source is scanned only once
+TOKEN_REGEX = re.compile(
+    r"(?P<COMMENT>//[^\n]*|/\*.*?\*/)"
+    r"|\b(?P<KEYWORD>class|constructor|function|method|field|static|var|int|char|boolean|void|true|false|null|this|let|do|if|else|while|return)\b"
+    r"|(?P<SYMBOL>[{}()\[\].,;+\-*/&|<>=~])"
+    r"|\b(?P<INT_CONST>0|[1-9]\d{0,4})\b"
+    r'|"(?P<STRING_CONST>[^"\n]*)"'
+    r"|\b(?P<IDENTIFIER>[a-zA-Z_][a-zA-Z0-9_]*)\b",
+    re.DOTALL
+)
+# the same over bytes, to scan memory-mapped sources
+# newlines are matched too, to keep track of the line numbers along the way
+MAPPED_TOKEN_REGEX = re.compile(TOKEN_REGEX.pattern.encode() + rb"|(?P<NEWLINE>\n)", re.DOTALL)
+
+# keyword and symbol values are interned, like the string literals the parser compares them with,
+# so that checks such as `peek_token() in ("let", "if", ...)` succeed on identity without comparing strings
+_INTERNED_VALUES = {value: sys.intern(value) for value in (
+    "class", "constructor", "function", "method", "field", "static", "var", "int", "char", "boolean", "void",
+    "true", "false", "null", "this", "let", "do", "if", "else", "while", "return",
+    "{", "}", "(", ")", "[", "]", ".", ",", ";", "+", "-", "*", "/", "&", "|", "<", ">", "=", "~"
+)}
+
+def _intern(value: str) -> str:
+    """
+    Interns the value of a keyword, symbol or identifier token.
+
+    Identifiers are interned too: they repeat all over the source, so each distinct name is only stored once.
+    """
+    return _INTERNED_VALUES.get(value) or sys.intern(value)
+
 class JackToken:
     """
     Represents a single token in the Jack programming language.
@@ -11,10 +42,14 @@ class JackToken:
     Attributes:
         token_type (TokenType): The type of the token.
         token_value (str): The value of the token.
+        start (Optional[int]): Offset of the value in the source, if it is known.
     """
-    def __init__(self, token_type: TokenType, token_value: str):
+    __slots__ = ("token_type", "token_value", "start") # one token per word of the source, so no per-instance dict
+
+    def __init__(self, token_type: TokenType, token_value: str, start: Optional[int] = None):
         self.token_type = token_type
         self.token_value = token_value
+        self.start = start
 
     def get_type(self) -> TokenType:
         """
@@ -28,19 +63,74 @@ class JackToken:
         """
         return self.token_value
 
+    def get_position(self) -> Optional[Tuple[int, int]]:
+        """
+        Retrieves the line and column of the token in the source, if the token knows them by itself.
+        """
+        return None
+
+class MappedJackToken(JackToken):
+    """
+    A token of a memory-mapped source, which only points at its text: the value is decoded the first time
+    it is retrieved, and the position is known without keeping any copy of the source.
+
+    Attributes:
+        token_type (TokenType): The type of the token.
+        token_value (Optional[str]): The value of the token, once retrieved.
+        source (mmap.mmap): The memory-mapped source.
+        start (int): Byte offset of the value in the source.
+        end (int): Byte offset right after the value.
+        line (int): Line of the token, starting at 1.
+    """
+    __slots__ = ("source", "end", "line")
+
+    def __init__(self, token_type: TokenType, source: mmap.mmap, start: int, end: int, line: int):
+        self.token_type = token_type
+        self.token_value = None
+        self.source = source
+        self.start = start
+        self.end = end
+        self.line = line
+
+    def get_value(self) -> str:
+        """
+        Retrieves the value of the token, decoding it from the source the first time.
+        """
+        if self.token_value is None:
+            token_value = self.source[self.start:self.end].decode()
+            if self.token_type == "INT_CONST":
+                token_value = int(token_value)
+            elif self.token_type != "STRING_CONST":
+                token_value = _intern(token_value)
+            self.token_value = token_value
+
+        return self.token_value
+
+    def get_position(self) -> Optional[Tuple[int, int]]:
+        """
+        Retrieves the line and column of the token in the source, both starting at 1.
+        """
+        return self.line, self.start - self.source.rfind(b"\n", 0, self.start)
+
 class JackTokenizer:
     """
     Tokenizes Jack source code into JackTokens.
 
     Attributes:
         infile (TextIO): Input file containing Jack source code.
+        use_mmap (bool): Whether to scan a memory map of the file instead of reading it into memory.
         buffer (Deque[JackToken]): Buffer to hold tokens temporarily.
         token_generator (Iterator[JackToken]): Generator to produce tokens.
+        source (Optional[str]): The source, once read into memory.
+        last_token (Optional[JackToken]): The last token used.
     """
-    def __init__(self, infile: TextIO):
+    def __init__(self, infile: TextIO, use_mmap: bool = False):
         self.infile = infile
+        self.use_mmap = use_mmap
         self.buffer: Deque[JackToken] = deque()
-        self.token_generator = self.generate_token()
+        self.token_generator = self.generate_mapped_token() if use_mmap else self.generate_token()
+        self.source: Optional[str] = None
+        self.last_token: Optional[JackToken] = None
 
     def use_token(self) -> JackToken:
         """
@@ -48,9 +138,29 @@ class JackTokenizer:
         Else retrieves it directly from the generator.
         """
         if self.buffer:
-            return self.buffer.popleft()
-        
-        return next(self.token_generator)
+            token = self.buffer.popleft()
+        else:
+            token = next(self.token_generator)
+
+        self.last_token = token
+        return token
+
+    def get_position(self) -> Optional[Tuple[int, int]]:
+        """
+        Retrieves the line and column of the last token used, both starting at 1, e.g. to locate a syntax error.
+        None before the first token.
+        """
+        token = self.last_token
+        if token is None:
+            return None
+
+        position = token.get_position()
+        if position is None and token.start is not None and self.source is not None:
+            # found from the source, as plain tokens only keep their offset
+            position = (self.source.count("\n", 0, token.start) + 1,
+                        token.start - self.source.rfind("\n", 0, token.start))
+
+        return position
 
     def buffer_token(self) -> None:
         """
@@ -69,102 +179,45 @@ class JackTokenizer:
 
     def generate_token(self) -> Iterator[JackToken]:
         """
-        Generates tokens from the Jack source code.
-        """
-        keyword_pattern = r"\b(class|constructor|function|method|field|static|var|int|char|boolean|void|true|false|null|this|let|do|if|else|while|return)\b"
-        symbol_pattern = r"[{}()\[\].,;+\-*/&|<>=~]"
-        integer_constant_pattern = r"\b(0|[1-9]\d{0,4})\b"
-        string_constant_pattern = r'"([^"\n]*)"'
-        identifier_pattern = r"\b[a-zA-Z_][a-zA-Z0-9_]*\b"
-        token_pattern = f"{keyword_pattern}|{symbol_pattern}|{integer_constant_pattern}|{string_constant_pattern}|{identifier_pattern}"
-        
-        code = self.infile.read()
-        cleaned_code = self._strip_comments(code)
-        cleaned_lines = cleaned_code.splitlines()
-
-        for line in cleaned_lines:
-            for token in re.finditer(token_pattern, line):
-                token_str = token.group()
-                token_type = self.get_token_type(token_str)
-                token_value = self.get_token_value(token_str, token_type)
-                yield JackToken(token_type, token_value)
-
-    def _strip_comments(self, code: str) -> str:
-        """
-        Removes comments from the Jack source code.
-        """
-        single_line_pattern = r'//.*?$'
-        multi_line_pattern = r'/\*.*?\*/'  
-        pattern = f"{single_line_pattern}|{multi_line_pattern}"
-        
-        return re.sub(pattern, '', code, flags=re.DOTALL | re.MULTILINE).strip()
-
-    def get_token_type(self, token: str) -> TokenType:
-        """
-        Determines the type of a given token.
-        """
-        if token in ("class", "constructor", "function", "method", "field", "static", "var", "int", "char", "boolean", 
-                                  "void", "true", "false", "null", "this", "let", "do", "if", "else", "while", "return"):
-            return "KEYWORD"
-        elif token in ("{", "}", "(", ")", "[", "]", ".",  ",", ";", "+", "-", "*", "/", "&", "|", "<", ">", "=", "~"):
-            return "SYMBOL"
-        elif token.isdigit():
-            return "INT_CONST"
-        elif token.startswith('"'):
-            return "STRING_CONST"
-        else:
-            return "IDENTIFIER"
-
-    def get_token_value(self, token: str, token_type: TokenType) -> Union[str, int]:
-        """
-        Interprets the value of a given token based on its type.
+        Generates tokens from the Jack source code, in a single scan of the whole file.
         """
-        if token_type == "KEYWORD":
-            return self._keyword_val(token)
-        elif token_type == "SYMBOL":
-            return self._symbol_val(token)
-        elif token_type == "INT_CONST":
-            return self._int_val(token)
-        elif token_type == "STRING_CONST":
-            return self._string_val(token)
-        elif token_type == "IDENTIFIER":
-            return self._identifier_val(token)
+        self.source = self.infile.read()
+        for match in TOKEN_REGEX.finditer(self.source):
+            token_type = match.lastgroup
+            if token_type == "COMMENT":
+                continue
 
-    def _keyword_val(self, token: str) -> str:
-        """
-        Interprets the value of a keyword token.
-        """
-        return token
+            token_value = match.group(token_type)
+            if token_type == "INT_CONST":
+                token_value = int(token_value)
+            elif token_type != "STRING_CONST":
+                token_value = _intern(token_value)
 
-    def _symbol_val(self, token: str) -> str:
-        """
-        Interprets the value of a symbol token.
-        """
-        if token == "<":
-            return "&lt;"
-        elif token == ">":
-            return "&gt;"
-        elif token == '"':
-            return "&quot;"
-        elif token == "&":
-            return "&amp;"
-        else:
-            return token
+            yield JackToken(token_type, token_value, match.start(token_type))
 
-    def _int_val(self, token: str) -> int:
+    def generate_mapped_token(self) -> Iterator[JackToken]:
         """
-        Interprets the value of an integer constant token.
-        """
-        return int(token)
+        Generates tokens from a memory map of the Jack source file, in a single scan.
 
-    def _string_val(self, token: str) -> str:
-        """
-        Interprets the value of a string constant token.
-        """
-        return token.strip('"')
-    
-    def _identifier_val(self, token: str) -> str:
-        """
-        Interprets the value of an identifier token.
+        The source is never copied into memory: tokens only keep the byte offsets of their value and their line.
+        The map stays open for as long as tokens refer to it, and is closed when the last of them is collected.
+        Sources that can't be mapped (in-memory or empty files) are read instead.
         """
-        return token
\ No newline at end of file
+        try:
+            source = mmap.mmap(self.infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError): # no file descriptor, or empty file
+            yield from self.generate_token()
+            return
+
+        line = 1
+        for match in MAPPED_TOKEN_REGEX.finditer(source):
+            token_type = match.lastgroup
+            if token_type == "NEWLINE":
+                line += 1
+                continue
+            if token_type == "COMMENT":
+                line += match.group().count(b"\n") # block comments can span lines
+                continue
+
+            start, end = match.span(token_type)
+            yield MappedJackToken(token_type, source, start, end, line)
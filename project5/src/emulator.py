@@ -0,0 +1,389 @@
+import os, sys, argparse
+from array import array
+from typing import Iterable, List, Optional, Tuple, Union
+
+RAM_SIZE = 32768 # 15-bit address space: data memory, screen memory map and keyboard
+SCREEN = 16384
+KBD = 24576
+
+
+def _wrap(value: int) -> int:
+    """
+    Wraps an integer around to the signed 16-bit range, like the Hack ALU does.
+    """
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+# comp bits (a c1 c2 c3 c4 c5 c6) -> ALU output given the D, A and M values
+_COMP = {
+    0b0101010: lambda d, a, m: 0,
+    0b0111111: lambda d, a, m: 1,
+    0b0111010: lambda d, a, m: -1,
+    0b0001100: lambda d, a, m: d,
+    0b0110000: lambda d, a, m: a,
+    0b1110000: lambda d, a, m: m,
+    0b0001101: lambda d, a, m: ~d,
+    0b0110001: lambda d, a, m: ~a,
+    0b1110001: lambda d, a, m: ~m,
+    0b0001111: lambda d, a, m: _wrap(-d),
+    0b0110011: lambda d, a, m: _wrap(-a),
+    0b1110011: lambda d, a, m: _wrap(-m),
+    0b0011111: lambda d, a, m: _wrap(d + 1),
+    0b0110111: lambda d, a, m: _wrap(a + 1),
+    0b1110111: lambda d, a, m: _wrap(m + 1),
+    0b0001110: lambda d, a, m: _wrap(d - 1),
+    0b0110010: lambda d, a, m: _wrap(a - 1),
+    0b1110010: lambda d, a, m: _wrap(m - 1),
+    0b0000010: lambda d, a, m: _wrap(d + a),
+    0b1000010: lambda d, a, m: _wrap(d + m),
+    0b0010011: lambda d, a, m: _wrap(d - a),
+    0b1010011: lambda d, a, m: _wrap(d - m),
+    0b0000111: lambda d, a, m: _wrap(a - d),
+    0b1000111: lambda d, a, m: _wrap(m - d),
+    0b0000000: lambda d, a, m: d & a,
+    0b1000000: lambda d, a, m: d & m,
+    0b0010101: lambda d, a, m: d | a,
+    0b1010101: lambda d, a, m: d | m,
+}
+
+def _wrapped(expression: str) -> str:
+    """
+    Wraps a Python expression in the source equivalent of `_wrap`.
+    """
+    return f"((({expression}) + 32768) & 65535) - 32768"
+
+
+# the same ALU functions as Python source templates, used to generate compiled blocks
+_COMP_SOURCE = {
+    0b0101010: "0",
+    0b0111111: "1",
+    0b0111010: "-1",
+    0b0001100: "{d}",
+    0b0110000: "{a}",
+    0b1110000: "{m}",
+    0b0001101: "~{d}",
+    0b0110001: "~{a}",
+    0b1110001: "~{m}",
+    0b0001111: _wrapped("-{d}"),
+    0b0110011: _wrapped("-{a}"),
+    0b1110011: _wrapped("-{m}"),
+    0b0011111: _wrapped("{d} + 1"),
+    0b0110111: _wrapped("{a} + 1"),
+    0b1110111: _wrapped("{m} + 1"),
+    0b0001110: _wrapped("{d} - 1"),
+    0b0110010: _wrapped("{a} - 1"),
+    0b1110010: _wrapped("{m} - 1"),
+    0b0000010: _wrapped("{d} + {a}"),
+    0b1000010: _wrapped("{d} + {m}"),
+    0b0010011: _wrapped("{d} - {a}"),
+    0b1010011: _wrapped("{d} - {m}"),
+    0b0000111: _wrapped("{a} - {d}"),
+    0b1000111: _wrapped("{m} - {d}"),
+    0b0000000: "{d} & {a}",
+    0b1000000: "{d} & {m}",
+    0b0010101: "{d} | {a}",
+    0b1010101: "{d} | {m}",
+}
+
+# jump bits -> condition on the ALU output
+_JUMP_SOURCE = {
+    0b001: "x > 0",
+    0b010: "x == 0",
+    0b011: "x >= 0",
+    0b100: "x < 0",
+    0b101: "x != 0",
+    0b110: "x <= 0",
+}
+
+# Instruction = int (A-instruction, the value to load) | (comp, uses_m, dest, jump) (C-instruction)
+Instruction = Union[int, Tuple]
+
+
+def load_rom(filepath: str) -> array:
+    """
+    Loads a Hack program, either the text .hack output of the assembler or its packed little-endian .bin image.
+
+    Args:
+        filepath (str): Path to the .hack or .bin file.
+
+    Returns:
+        array: The program as 16-bit words.
+    """
+    rom = array("H")
+
+    if filepath.endswith(".bin"):
+        with open(filepath, "rb") as infile:
+            rom.frombytes(infile.read())
+        if sys.byteorder == "big":
+            rom.byteswap()
+    else:
+        with open(filepath, "r") as infile:
+            rom.extend(int(line, 2) for line in infile if line.strip())
+
+    return rom
+
+
+def decode(word: int) -> Instruction:
+    """
+    Decodes a 16-bit Hack instruction into the compact form executed by `HackComputer`.
+
+    Args:
+        word (int): The instruction.
+
+    Returns:
+        Instruction: The value to load for an A-instruction, or the (comp, uses_m, dest, jump) tuple of a C-instruction,
+        where comp is the ALU function, uses_m tells whether it reads M, and dest/jump are the raw 3-bit fields.
+    """
+    if not word & 0x8000: # A-instruction
+        return word
+
+    comp_bits = (word >> 6) & 0b1111111
+    return (_COMP[comp_bits], bool(comp_bits & 0b1000000), (word >> 3) & 0b111, word & 0b111)
+
+
+class HackComputer:
+    """
+    Emulates the Hack computer: the CPU executing a ROM program against 32K words of RAM.
+
+    The ROM is decoded once up front. The CPU state lives in `a`, `d`, `pc` and `ram` between runs,
+    so a program can be run in slices of cycles and inspected (or fed keyboard input through `ram[KBD]`) in between.
+
+    Attributes:
+        words (array): The program as 16-bit words.
+        rom (List[Instruction]): The decoded program.
+        ram (array): The data memory, including the screen and keyboard memory maps, as signed 16-bit words.
+        a (int): The A register.
+        d (int): The D register.
+        pc (int): The program counter.
+        cycles (int): Number of instructions executed since the last reset.
+        halted (bool): Whether the program reached a halt loop.
+    """
+    def __init__(self, rom: Iterable[int]):
+        """
+        Args:
+            rom (Iterable[int]): The program as 16-bit words, e.g. from `load_rom`.
+        """
+        self.words = array("H", rom)
+        self.rom: List[Instruction] = [decode(word) for word in self.words]
+        self.halt_addresses = self._find_halt_addresses()
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.blocks = {} # compiled blocks: start address -> (function, number of instructions, end address)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets the CPU, like the Hack computer's reset bit. RAM is left untouched.
+        """
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        self.cycles = 0
+        self.halted = False
+
+    def run(self, max_cycles: Optional[int] = None) -> int:
+        """
+        Runs the program until it halts or until the cycle budget is used up.
+
+        A program halts when it jumps into the `(END) @END 0;JMP` idiom (an A-instruction loading its own address
+        followed by an unconditional jump), or when the program counter runs past the end of the ROM.
+
+        Args:
+            max_cycles (Optional[int]): Max number of instructions to execute. Runs until halt if None.
+
+        Returns:
+            int: Number of instructions executed by this call.
+        """
+        rom = self.rom
+        ram = self.ram
+        halt_addresses = self.halt_addresses
+        a, d, pc = self.a, self.d, self.pc
+        budget = max_cycles if max_cycles is not None else -1
+        executed = 0
+
+        while executed != budget:
+            try:
+                inst = rom[pc]
+            except IndexError: # ran past the end of the program
+                self.halted = True
+                break
+            executed += 1
+
+            if inst.__class__ is int: # A-instruction
+                a = inst
+                pc += 1
+                continue
+
+            comp, uses_m, dest, jump = inst
+            address = a & 0x7FFF
+            out = comp(d, a, ram[address] if uses_m else 0)
+
+            target = a # both M and the jump are addressed by A before this instruction updates it
+            if dest:
+                if dest & 1:
+                    ram[address] = out
+                if dest & 2:
+                    d = out
+                if dest & 4:
+                    a = out
+
+            if jump and (jump == 7 or (jump & 4 and out < 0) or (jump & 2 and out == 0) or (jump & 1 and out > 0)):
+                pc = target & 0x7FFF
+                if pc in halt_addresses:
+                    self.halted = True
+                    break
+            else:
+                pc += 1
+
+        self.a, self.d, self.pc = a, d, pc
+        self.cycles += executed
+
+        return executed
+
+    def run_compiled(self, max_cycles: Optional[int] = None) -> int:
+        """
+        Runs the program like `run`, but executes whole basic blocks at a time.
+
+        A basic block is the run of instructions from an entry address up to and including the next jump
+        instruction. The first time the program enters an address, the block starting there is compiled into a
+        Python function (see `_compile_block`) and cached by its start address, so loops and the long straight-line
+        sequences generated for VM calls and returns are only decoded once. When the remaining cycle budget is
+        smaller than the next block, the last few instructions are interpreted so that the budget is exact.
+
+        Args:
+            max_cycles (Optional[int]): Max number of instructions to execute. Runs until halt if None.
+
+        Returns:
+            int: Number of instructions executed by this call.
+        """
+        blocks = self.blocks
+        ram = self.ram
+        halt_addresses = self.halt_addresses
+        a, d, pc = self.a, self.d, self.pc
+        budget = max_cycles if max_cycles is not None else -1
+        executed = 0
+
+        while executed != budget:
+            try:
+                function, length, end = blocks[pc]
+            except KeyError:
+                if pc >= len(self.words): # ran past the end of the program
+                    self.halted = True
+                    break
+                function, length, end = blocks[pc] = self._compile_block(pc)
+
+            if budget != -1 and executed + length > budget:
+                self.a, self.d, self.pc = a, d, pc
+                self.cycles += executed
+                return executed + self.run(budget - executed)
+
+            a, d, pc = function(ram, a, d)
+            executed += length
+
+            if pc != end and pc in halt_addresses: # jumped into a halt loop
+                self.halted = True
+                break
+
+        self.a, self.d, self.pc = a, d, pc
+        self.cycles += executed
+
+        return executed
+
+    def _compile_block(self, start: int) -> Tuple:
+        """
+        Compiles the basic block starting at a ROM address into a Python function.
+
+        The generated function takes (ram, a, d) and returns the new (a, d, pc). Values loaded by A-instructions
+        are propagated as constants, so `@SP M=M+1` becomes a single `ram[0] = ...` statement, and A is only
+        written back when the block returns.
+
+        Args:
+            start (int): The ROM address of the first instruction of the block.
+
+        Returns:
+            Tuple: The compiled function, the number of instructions in the block and the address right after it.
+        """
+        lines = ["def block(ram, a, d):"]
+        a_value = "a" # the current value of A: a constant after an A-instruction, the variable otherwise
+        pc = start
+
+        while pc < len(self.words):
+            word = self.words[pc]
+            pc += 1
+
+            if not word & 0x8000: # A-instruction
+                a_value = str(word)
+                continue
+
+            comp_bits, dest, jump = (word >> 6) & 0b1111111, (word >> 3) & 0b111, word & 0b111
+            address = a_value if a_value != "a" else "(a & 32767)"
+            expression = _COMP_SOURCE[comp_bits].format(d="d", a=a_value, m=f"ram[{address}]")
+
+            lines.append(f"    x = {expression}")
+            target = a_value
+            if jump and dest & 4 and a_value == "a": # the jump goes to the old A
+                lines.append("    t = a")
+                target = "t"
+            if dest & 1:
+                lines.append(f"    ram[{address}] = x")
+            if dest & 2:
+                lines.append("    d = x")
+            if dest & 4:
+                lines.append("    a = x")
+                a_value = "a"
+
+            if jump:
+                target = target if target.isdigit() else f"{target} & 32767"
+                if jump == 0b111:
+                    lines.append(f"    return {a_value}, d, {target}")
+                else:
+                    lines.append(f"    if {_JUMP_SOURCE[jump]}:")
+                    lines.append(f"        return {a_value}, d, {target}")
+                    lines.append(f"    return {a_value}, d, {pc}")
+                break
+        else: # reached the end of the ROM
+            lines.append(f"    return {a_value}, d, {pc}")
+
+        namespace = {}
+        exec(compile("\n".join(lines), f"<hack block {start}>", "exec"), namespace)
+
+        return namespace["block"], pc - start, pc
+
+    def _find_halt_addresses(self) -> set:
+        """
+        Finds the ROM addresses of `@X 0;JMP` loops where X is the address of the A-instruction itself.
+        """
+        halt_addresses = set()
+
+        for address in range(len(self.rom) - 1):
+            inst, next_inst = self.rom[address], self.rom[address + 1]
+            if inst == address and next_inst.__class__ is tuple and next_inst[2] == 0 and next_inst[3] == 0b111:
+                halt_addresses.add(address)
+
+        return halt_addresses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a Hack program on an emulated Hack computer.")
+    parser.add_argument("rom_filepath", help="path to the .hack or .bin file")
+    parser.add_argument("--cycles", type=int, help="max number of instructions to execute (default: run until halt)")
+    parser.add_argument("--jit", action="store_true", help="compile basic blocks into Python functions instead of interpreting")
+    parser.add_argument("--ram", nargs=2, type=int, metavar=("START", "END"), help="print RAM[START:END] after the run")
+    args = parser.parse_args()
+
+    # assume user input is valid
+    computer = HackComputer(load_rom(args.rom_filepath))
+    if args.jit:
+        computer.run_compiled(args.cycles)
+    else:
+        computer.run(args.cycles)
+
+    status = "halted" if computer.halted else "stopped"
+    print(f"{os.path.basename(args.rom_filepath)}: {status} after {computer.cycles} cycles (pc={computer.pc})")
+    if args.ram:
+        start, end = args.ram
+        for address in range(start, end):
+            print(f"RAM[{address}] = {computer.ram[address]}")
+
+
+if __name__ == "__main__":
+    main()
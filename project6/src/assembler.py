@@ -1,134 +1,310 @@
-import os, sys
-from typing import Dict, List
-from utils import to_binary
+import os, sys, argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Iterable, Iterator, Optional, Union
+from utils import to_binary, code_lines
 from symbol_table import init_symbol_table, read_label_symbols
 from translator import CTranslator
 
+# A-instructions hold a 15-bit address: anything larger would set the most significant bit, i.e. be read as a C-instruction
+MAX_ADDRESS = 0x7FFF
+
 
 class Assembler:
-    def __init__(self, asm_filepath: str, symbol_table: Dict[str, str]):
+    def __init__(self, asm_input: Union[str, Iterable[str]], symbol_table: Dict[str, int], out_filepath: Optional[str] = None):
         """
         Initializes the Assembler to translate a Hack assembly program into Hack binary machine code.
-        
+
         Args:
-            asm_filepath (str): Path to the input assembly file.
-            symbol_table (Dict[str, str]): Dict that maps symbols to binary addresses.
+            asm_input (Union[str, Iterable[str]]): Path to the input assembly file, or the assembly lines
+                themselves (e.g. a generator), in which case nothing is read from disk.
+            symbol_table (Dict[str, int]): Dict that maps symbols to addresses.
+            out_filepath (Optional[str]): Path to the .hack output file. Defaults to the input file path with
+                a .hack extension.
         """
-        self.in_filepath = asm_filepath
-        self.out_filepath = os.path.splitext(asm_filepath)[0] + ".hack"
+        if isinstance(asm_input, str):
+            self.in_filepath = asm_input
+            self.asm_lines = None
+            out_filepath = out_filepath or os.path.splitext(asm_input)[0] + ".hack"
+        else:
+            self.in_filepath = None
+            self.asm_lines = asm_input
+
+        self.out_filepath = out_filepath
+        self.bin_filepath = os.path.splitext(out_filepath)[0] + ".bin" if out_filepath else None
         self.symbol_table = symbol_table
         self.c_translator = CTranslator()
         self.base_memory = 16 # RAM address counter for new A-instruction symbols, starting at 16.
+        self.program = array("H") # the translated program, one 16-bit word per instruction
 
     def parse(self) -> None:
         """
-        Translates an assembly source file into binary code and writes the result to an output file.
+        Translates an assembly source file into binary code and stores the result in `program`.
         """
-        with open(self.in_filepath, "r") as infile, open(self.out_filepath, "w") as outfile:
-            for line in infile:
-                # preprocess
-                line = line.strip()  # remove whitespace
-                if line == "" or line[0] in "/(":
-                    continue  # ignore empty/ comment/ label line
+        for line in self._read_lines():
+            if line[0] == "(":
+                continue  # ignore label line
 
-                if line[0] == "@":  # A-instruction
-                    bin_code = self._translate_a_instruction(line)
-                else:  # C-instruction
-                    bin_code = self._translate_c_instruction(line)
-                
-                outfile.write(bin_code + "\n")
+            if line[0] == "@":  # A-instruction
+                word = self._translate_a_instruction(line)
+            else:  # C-instruction
+                word = self._translate_c_instruction(line)
 
-    def _translate_a_instruction(self, line: str) -> str:
+            self.program.append(word)
+
+    def parse_single_pass(self) -> None:
         """
-        Processes an A-instruction and returns its binary representation.
+        Translates an assembly source file into binary code in a single pass and stores the result in `program`.
 
-        Each time a symbolic A-instruction is encountered, the method checks if the symbol 
-        is already in the symbol table. If it is, it reads from it; otherwise, it enters
-        the new symbol with a free RAM slot (starting at address 16) into the table.
+        A symbolic A-instruction whose symbol is not known yet could be a label declared further down, so it is
+        recorded as a forward reference and backpatched once the whole file has been read. Symbols that never
+        get declared as labels are then allocated as variables in order of first use, which gives the same
+        addresses as the two-pass translation.
+        """
+        program = self.program
+        forward_refs: Dict[str, List[int]] = {}  # unresolved symbol -> indices of the instructions referencing it
+
+        for line in self._read_lines():
+            if line[0] == "(":  # label, points to the next instruction
+                self.symbol_table[line.strip("()")] = len(program)
+                continue
+
+            if line[0] == "@":  # A-instruction
+                if self._is_unresolved(line[1:]):  # maybe a label declared further down
+                    forward_refs.setdefault(line[1:], []).append(len(program))
+                    program.append(0)
+                    continue
+                word = self._translate_a_instruction(line)
+            else:  # C-instruction
+                word = self._translate_c_instruction(line)
+
+            program.append(word)
+
+        # backpatch: dicts keep insertion order, so variables are allocated in order of first use
+        for symbol, refs in forward_refs.items():
+            word = self._translate_a_instruction("@" + symbol)
+            for idx in refs:
+                program[idx] = word
+
+    def assemble(self) -> Iterator[int]:
+        """
+        Translates the input in a single pass and yields the encoded 16-bit words in program order.
+
+        Forward references can only be backpatched once the whole input has been consumed,
+        so the first word is yielded after the last line has been read.
+        """
+        self.parse_single_pass()
+        yield from self.program
+
+    def parse_parallel(self, jobs: int) -> None:
+        """
+        Translates an assembly source file into binary code across `jobs` worker processes and stores the result in `program`.
+
+        The symbol table is completed up front: labels are read along with the instructions, then variables are
+        allocated in order of first use, so every address is fixed before the fan-out and the result is the same
+        as the serial translation. The instructions are then split into one contiguous chunk per job, translated
+        independently and joined back in order.
 
         Args:
-            line (str): The A-instruction line from the input file.
+            jobs (int): Number of worker processes.
+        """
+        instructions = self._read_instructions()
+
+        # allocate the variables before the fan-out so that their addresses don't depend on the chunking
+        for line in instructions:
+            if line[0] == "@" and self._is_unresolved(line[1:]):
+                self._translate_a_instruction(line)
+
+        chunk_size = max(1, -(-len(instructions) // jobs))  # ceil
+        chunks = [instructions[i:i + chunk_size] for i in range(0, len(instructions), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # map keeps the order of the chunks
+            for words in executor.map(_translate_chunk, repeat(self.symbol_table), chunks):
+                self.program.extend(words)
+
+    def _read_instructions(self) -> List[str]:
+        """
+        Reads the instruction lines of the assembly source file and enters its labels into the symbol table.
 
         Returns:
-            str: The binary representation of the A-instruction.
+            List[str]: The stripped A- and C-instruction lines, in program order.
         """
-        address = line[1:]
+        instructions = []
 
-        try:  # valid integer address
-            bin_code = "0" + to_binary(int(address))
-        except ValueError:  # symbolic address (variable (RAM) or label (ROM))
-            if address in self.symbol_table:
-                bin_code = "0" + self.symbol_table[address]
+        for line in self._read_lines():
+            if line[0] == "(":  # label, points to the next instruction
+                self.symbol_table[line.strip("()")] = len(instructions)
             else:
-                self.symbol_table[address] = to_binary(int(self.base_memory))
-                bin_code = "0" + self.symbol_table[address]
-                self.base_memory += 1
+                instructions.append(line)
 
-        return bin_code
+        return instructions
 
-    def _translate_c_instruction(self, line: str) -> str:
+    def _read_lines(self) -> Iterator[str]:
         """
-        Processes a C-instruction and returns its binary representation.
+        Reads the input, from the assembly file or from the given lines.
+
+        Yields:
+            str: Each line of code, stripped of whitespace and comments.
+        """
+        if self.asm_lines is not None:
+            yield from code_lines(self.asm_lines)
+            return
 
-        The method extracts the `comp`, `dest`, and `jump` fields and translates them using the `Code` class.
+        with open(self.in_filepath, "r") as infile:
+            yield from code_lines(infile)
+
+    def _translate_instructions(self, instructions: List[str]) -> array:
+        """
+        Translates instruction lines whose symbols are all in the symbol table already.
 
         Args:
-            line (str): The C-instruction line from the input file.
+            instructions (List[str]): Stripped A- and C-instruction lines.
 
         Returns:
-            str: The binary representation of the C-instruction.
+            array: The translated instructions as 16-bit words.
         """
-        # fields is in the format of [comp, dest, jump]
-        fields = self._get_c_fields(line)
-        translated_fields = [
-            self.c_translator.translate(inst, i) for i, inst in enumerate(fields)
-        ]
-        bin_code = "111" + "".join(translated_fields)
+        words = array("H")
+
+        for line in instructions:
+            if line[0] == "@":  # A-instruction
+                words.append(self._translate_a_instruction(line))
+            else:  # C-instruction
+                words.append(self._translate_c_instruction(line))
 
-        return bin_code
+        return words
 
-    def _get_c_fields(self, instruction: str) -> List[str]:
+    def write_hack(self) -> None:
+        """
+        Writes the translated program to the output file as text, one 16-character binary string per line.
         """
-        Parses a C-instruction into its component fields: comp, dest, and jump.
+        with open(self.out_filepath, "w") as outfile:
+            outfile.write("".join(to_binary(word, 16) + "\n" for word in self.program))
+
+    def write_bin(self) -> None:
+        """
+        Writes the translated program to the .bin output file as packed little-endian 16-bit words,
+        so that a simulator can load or memory-map it directly as the ROM image.
+        """
+        program = self.program
+        if sys.byteorder == "big":
+            program = array("H", program)
+            program.byteswap()
+
+        with open(self.bin_filepath, "wb") as outfile:
+            program.tofile(outfile)
+
+    def _is_unresolved(self, address: str) -> bool:
+        """
+        Checks whether an A-instruction address is a symbol that is not in the symbol table yet.
 
         Args:
-            instruction (str): The C-instruction in the format of 'dest=comp;jump'.
+            address (str): The address part of the A-instruction (without '@').
 
         Returns:
-            List[str]: A list of ['comp', 'dest', 'jump'] fields of the C-instruction.
+            bool: True if the address is neither an integer nor a known symbol.
+        """
+        if address in self.symbol_table:
+            return False
+
+        try:
+            int(address)
+        except ValueError:
+            return True
+
+        return False
+
+    def _translate_a_instruction(self, line: str) -> int:
         """
-        fields = [None] * 3
+        Processes an A-instruction and returns its binary representation.
+
+        Each time a symbolic A-instruction is encountered, the method checks if the symbol
+        is already in the symbol table. If it is, it reads from it; otherwise, it enters
+        the new symbol with a free RAM slot (starting at address 16) into the table.
 
-        # split [left field, (maybe) jump]
-        split1 = instruction.split(";")
-        if len(split1) == 2:
-            fields[2] = split1[1]
+        Args:
+            line (str): The A-instruction line from the input file.
 
-        # split [(maybe) dest, comp]
-        split2 = split1[0].split("=")
-        if len(split2) == 2:
-            fields[1] = split2[0]
+        Returns:
+            int: The 16-bit A-instruction, i.e. the address itself with the most significant bit cleared.
 
-        fields[0] = split2[-1]
+        Raises:
+            ValueError: If the address, or the one of the symbol, doesn't fit in 15 bits.
+        """
+        address = line[1:]
 
-        return fields
+        try:  # valid integer address
+            word = int(address)
+        except ValueError:  # symbolic address (variable (RAM) or label (ROM))
+            if address not in self.symbol_table:
+                self.symbol_table[address] = self.base_memory
+                self.base_memory += 1
+            word = self.symbol_table[address]
+
+        if not 0 <= word <= MAX_ADDRESS:
+            raise ValueError(f"Address out of range (0-{MAX_ADDRESS}): {line}")
+
+        return word
+
+    def _translate_c_instruction(self, line: str) -> int:
+        """
+        Processes a C-instruction and returns its binary representation.
+
+        The whole instruction is decoded by the `CTranslator` class, which caches the result
+        so that repeated instructions are only split and looked up once.
+
+        Args:
+            line (str): The C-instruction line from the input file.
+
+        Returns:
+            int: The 16-bit C-instruction.
+        """
+        return self.c_translator.translate_instruction(line)
+
+
+def _translate_chunk(symbol_table: Dict[str, int], instructions: List[str]) -> array:
+    """
+    Translates one chunk of `Assembler.parse_parallel` in a worker process.
+    """
+    return Assembler(instructions, symbol_table)._translate_instructions(instructions)
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python assembler.py <asm-file-path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Translates a Hack assembly program into Hack binary machine code.")
+    parser.add_argument("asm_filepath", help="path to the .asm file")
+    parser.add_argument("--two-pass", action="store_true", help="read the file twice instead of backpatching labels")
+    parser.add_argument("--bin", action="store_true", help="write a packed little-endian .bin ROM image instead of .hack text")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes to translate with")
+    parser.add_argument("--stats", action="store_true", help="print the hit rate of the C-instruction decode cache")
+    args = parser.parse_args()
 
     # assume user input is valid
-    asm_filepath = sys.argv[1]
-
-    # first pass: read all the label symbols and their corresponding ROM address into the symbol table
+    asm_filepath = args.asm_filepath
     symbol_table = init_symbol_table()
-    read_label_symbols(asm_filepath, symbol_table)
-
-    # second pass: parse the assembly code
     assembler = Assembler(asm_filepath, symbol_table)
-    assembler.parse()
+
+    if args.two_pass:
+        # first pass: read all the label symbols and their corresponding ROM address into the symbol table
+        read_label_symbols(asm_filepath, symbol_table)
+        # second pass: parse the assembly code
+        assembler.parse()
+    elif args.jobs > 1:
+        # labels and variables are resolved first, then chunks of instructions are translated in parallel
+        assembler.parse_parallel(args.jobs)
+    else:
+        # single pass: labels are backpatched once the whole file has been read
+        assembler.parse_single_pass()
+
+    if args.bin:
+        assembler.write_bin()
+    else:
+        assembler.write_hack()
+
+    if args.stats:
+        hits, misses, _, size = assembler.c_translator.cache_info()
+        hit_rate = hits / (hits + misses) if hits + misses else 0
+        print(f"C-instruction cache: {hits} hits, {misses} misses ({hit_rate:.1%} hit rate), {size} entries")
 
 
 if __name__ == "__main__":
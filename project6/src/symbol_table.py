@@ -1,27 +1,27 @@
 from typing import Dict
-from utils import to_binary
+from utils import code_lines
 
 
-def init_symbol_table() -> Dict[str, str]:
+def init_symbol_table() -> Dict[str, int]:
     """
-    Create a symbol table with Hack predefined symbols and their 15-bit binary values.
+    Create a symbol table with Hack predefined symbols and their addresses.
 
     Returns:
-        Dict[str, str]: Dictionary of symbol names and their binary string representations.
+        Dict[str, int]: Dictionary of symbol names and their addresses.
     """
     return {
-        "SP": to_binary(0),
-        "LCL": to_binary(1),
-        "ARG": to_binary(2),
-        "THIS": to_binary(3),
-        "THAT": to_binary(4),
-        **{("R" + str(i)): to_binary(i) for i in range(16)},
-        "SCREEN": to_binary(16384),
-        "KBD": to_binary(24576),
+        "SP": 0,
+        "LCL": 1,
+        "ARG": 2,
+        "THIS": 3,
+        "THAT": 4,
+        **{("R" + str(i)): i for i in range(16)},
+        "SCREEN": 16384,
+        "KBD": 24576,
     }
 
 
-def read_label_symbols(filepath: str, symbol_table: Dict[str, str]) -> None:
+def read_label_symbols(filepath: str, symbol_table: Dict[str, int]) -> None:
     """
     Parses label symbols from an assembly file and updates the symbol table.
 
@@ -30,7 +30,7 @@ def read_label_symbols(filepath: str, symbol_table: Dict[str, str]) -> None:
 
     Args:
         filepath (str): Path to the assembly file.
-        symbol_table (Dict[str, str]): Dictionary to update with labels and their binary addresses.
+        symbol_table (Dict[str, int]): Dictionary to update with labels and their addresses.
 
     Returns:
         None: Updates `symbol_table` in place.
@@ -39,11 +39,7 @@ def read_label_symbols(filepath: str, symbol_table: Dict[str, str]) -> None:
     line_num = -1
 
     with open(filepath, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line == "" or line.startswith("//"):
-                continue
-
+        for line in code_lines(file):
             # valid assembly code
             if not line.startswith("("):
                 line_num += 1
@@ -51,4 +47,4 @@ def read_label_symbols(filepath: str, symbol_table: Dict[str, str]) -> None:
 
             # a label
             label = line.strip("()")
-            symbol_table[label] = to_binary(line_num + 1)
+            symbol_table[label] = line_num + 1
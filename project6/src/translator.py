@@ -1,72 +1,95 @@
+from functools import lru_cache
+from typing import List, Tuple
+
+# the three leading 1 bits of every C-instruction
+C_INSTRUCTION_PREFIX = 0b111 << 13
+
+
 class CTranslator:
     """
     A class to handle the translation of Hack assembly C-instruction fields to binary code.
 
+    Each code is stored already shifted to its position in the 16-bit instruction
+    (comp: bits 12-6, dest: bits 5-3, jump: bits 2-0), so a whole C-instruction is
+    `C_INSTRUCTION_PREFIX | comp | dest | jump`.
+
     Attributes:
         comp_dict (dict): A dictionary mapping computation mnemonics to their binary codes.
         dest_dict (dict): A dictionary mapping destination mnemonics to their binary codes.
         jump_dict (dict): A dictionary mapping jump mnemonics to their binary codes.
 
+    Whole C-instructions are decoded through `translate_instruction`, which keeps a bounded LRU
+    cache keyed on the instruction text, as compiler-generated assembly repeats the same handful of
+    C-instructions over and over.
+
     Methods:
-        translate(inst: str, field: int) -> str
+        translate(inst: str, field: int) -> int
+        translate_instruction(instruction: str) -> int
+        cache_info() -> functools._CacheInfo
 
     Raises:
         KeyError: If the provided instruction or field is invalid.
     """
 
-    def __init__(self):
+    def __init__(self, cache_size: int = 256):
+        """
+        Args:
+            cache_size (int, optional): Max number of decoded C-instructions to keep in the cache. Defaults to 256.
+        """
         self.comp_dict = {
-            "0": "0101010",
-            "1": "0111111",
-            "-1": "0111010",
-            "D": "0001100",
-            "A": "0110000",
-            "M": "1110000",
-            "!D": "0001101",
-            "!A": "0110001",
-            "!M": "1110001",
-            "-D": "0001111",
-            "-A": "0110011",
-            "-M": "1110011",
-            "D+1": "0011111",
-            "A+1": "0110111",
-            "M+1": "1110111",
-            "D-1": "0001110",
-            "A-1": "0110010",
-            "M-1": "1110010",
-            "D+A": "0000010",
-            "D+M": "1000010",
-            "D-A": "0010011",
-            "D-M": "1010011",
-            "A-D": "0000111",
-            "M-D": "1000111",
-            "D&A": "0000000",
-            "D&M": "1000000",
-            "D|A": "0010101",
-            "D|M": "1010101",
+            "0": 0b0101010 << 6,
+            "1": 0b0111111 << 6,
+            "-1": 0b0111010 << 6,
+            "D": 0b0001100 << 6,
+            "A": 0b0110000 << 6,
+            "M": 0b1110000 << 6,
+            "!D": 0b0001101 << 6,
+            "!A": 0b0110001 << 6,
+            "!M": 0b1110001 << 6,
+            "-D": 0b0001111 << 6,
+            "-A": 0b0110011 << 6,
+            "-M": 0b1110011 << 6,
+            "D+1": 0b0011111 << 6,
+            "A+1": 0b0110111 << 6,
+            "M+1": 0b1110111 << 6,
+            "D-1": 0b0001110 << 6,
+            "A-1": 0b0110010 << 6,
+            "M-1": 0b1110010 << 6,
+            "D+A": 0b0000010 << 6,
+            "D+M": 0b1000010 << 6,
+            "D-A": 0b0010011 << 6,
+            "D-M": 0b1010011 << 6,
+            "A-D": 0b0000111 << 6,
+            "M-D": 0b1000111 << 6,
+            "D&A": 0b0000000 << 6,
+            "D&M": 0b1000000 << 6,
+            "D|A": 0b0010101 << 6,
+            "D|M": 0b1010101 << 6,
         }
         self.dest_dict = {
-            None: "000",
-            "M": "001",
-            "D": "010",
-            "MD": "011",
-            "A": "100",
-            "AM": "101",
-            "AD": "110",
-            "AMD": "111",
+            None: 0b000 << 3,
+            "M": 0b001 << 3,
+            "D": 0b010 << 3,
+            "MD": 0b011 << 3,
+            "A": 0b100 << 3,
+            "AM": 0b101 << 3,
+            "AD": 0b110 << 3,
+            "AMD": 0b111 << 3,
         }
         self.jump_dict = {
-            None: "000",
-            "JGT": "001",
-            "JEQ": "010",
-            "JGE": "011",
-            "JLT": "100",
-            "JNE": "101",
-            "JLE": "110",
-            "JMP": "111",
+            None: 0b000,
+            "JGT": 0b001,
+            "JEQ": 0b010,
+            "JGE": 0b011,
+            "JLT": 0b100,
+            "JNE": 0b101,
+            "JLE": 0b110,
+            "JMP": 0b111,
         }
 
-    def translate(self, inst: str, field: int) -> str:
+        self.translate_instruction = lru_cache(maxsize=cache_size)(self._translate_instruction)
+
+    def translate(self, inst: str, field: int) -> int:
         """
         Translates a Hack assembly C-instruction field to its binary representation.
 
@@ -78,7 +101,7 @@ class CTranslator:
                 - 2: jump
 
         Returns:
-            str: The binary representation of the instruction component.
+            int: The binary representation of the instruction component, shifted into place.
 
         Raises:
             KeyError: If the instruction component or field is invalid.
@@ -92,3 +115,50 @@ class CTranslator:
             return self.jump_dict[inst]
         else:
             raise KeyError("Invalid instruction {inst}")
+
+    def cache_info(self) -> Tuple[int, int, int, int]:
+        """
+        Returns the hits, misses, max size and current size of the C-instruction decode cache.
+        """
+        return self.translate_instruction.cache_info()
+
+    def _translate_instruction(self, instruction: str) -> int:
+        """
+        Translates a whole Hack assembly C-instruction to its binary representation.
+        Called through the `translate_instruction` cache.
+
+        Args:
+            instruction (str): The C-instruction in the format of 'dest=comp;jump'.
+
+        Returns:
+            int: The 16-bit C-instruction.
+        """
+        comp, dest, jump = self._get_fields(instruction)
+
+        return C_INSTRUCTION_PREFIX | self.translate(comp, 0) | self.translate(dest, 1) | self.translate(jump, 2)
+
+    def _get_fields(self, instruction: str) -> List[str]:
+        """
+        Parses a C-instruction into its component fields: comp, dest, and jump.
+
+        Args:
+            instruction (str): The C-instruction in the format of 'dest=comp;jump'.
+
+        Returns:
+            List[str]: A list of ['comp', 'dest', 'jump'] fields of the C-instruction.
+        """
+        fields = [None] * 3
+
+        # split [left field, (maybe) jump]
+        split1 = instruction.split(";")
+        if len(split1) == 2:
+            fields[2] = split1[1]
+
+        # split [(maybe) dest, comp]
+        split2 = split1[0].split("=")
+        if len(split2) == 2:
+            fields[1] = split2[0]
+
+        fields[0] = split2[-1]
+
+        return fields
@@ -1,3 +1,6 @@
+from typing import Iterable, Iterator
+
+
 def to_binary(value: int, bits: int = 15) -> str:
     """
     Convert an base-10 integer to a binary string with a specified number of bits.
@@ -10,3 +13,21 @@ def to_binary(value: int, bits: int = 15) -> str:
         str: The binary string representation of the integer, zero-padded to the specified number of bits.
     """
     return format(value, f"0{bits}b")
+
+
+def code_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Strip assembly lines down to their code.
+
+    Args:
+        lines (Iterable[str]): Raw lines of assembly, e.g. an open file or a generator of lines.
+
+    Yields:
+        str: Each non-empty line without surrounding whitespace and comments.
+    """
+    for line in lines:
+        line = line.strip()  # remove whitespace
+        if "//" in line:
+            line = line.split("//")[0].rstrip()  # remove (inline) comment
+        if line:
+            yield line
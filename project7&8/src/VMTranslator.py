@@ -1,13 +1,40 @@
-import os, sys
+import os, sys, argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 from code_writer import CodeWriter
+from peephole import PeepholeOptimizer
+from vm_parser import VMCommand, COMMAND_TYPES, C_ARITHMETIC, C_PUSH, C_POP, C_FUNCTION, parse_command, parse_file
+from translation_cache import TranslationCache
+from linker import find_dead_functions, strip_functions
+from vm_optimizer import VMOptimizer
+
+OUT_BUFFER_SIZE = 1 << 16 # the .asm file is written in one go, so use a larger buffer than the default
 
 class VMTranslator:
-    def __init__(self, vm_input: str):
+    def __init__(self, vm_input: str, optimize: bool = False, trampolines: bool = False, compact: bool = False,
+                 comments: bool = False, jobs: int = 1, cache_dir: Optional[str] = None, link: bool = False,
+                 vm_optimize: bool = False):
         """
         Initializes the VMTranslator with the input VM file or directory.
 
         Args:
             vm_input (str): Path to the input VM file or directory containing VM files.
+            optimize (bool, optional): Whether to run the generated assembly through the peephole optimizer. Defaults to False.
+            trampolines (bool, optional): Whether calls and returns jump to shared routines instead of being expanded
+                inline, which makes the program smaller at the cost of a few more cycles per call. Defaults to False.
+            compact (bool, optional): Whether to emit one instruction per line, without the indentation and comments
+                of the templates. Defaults to False.
+            comments (bool, optional): In compact mode, whether to precede the code of each VM command with the command
+                itself as a comment. Defaults to False.
+            jobs (int, optional): Number of worker processes translating the VM files in parallel. Defaults to 1.
+            cache_dir (Optional[str], optional): Directory of the on-disk cache of translated files, which lets
+                rebuilds only translate the files that changed. An empty string puts it in a .vmcache directory next
+                to the output file. No cache if None. Defaults to None.
+            link (bool, optional): In directory mode, whether to leave out the functions that can't be reached
+                from Sys.init. Defaults to False.
+            vm_optimize (bool, optional): Whether to fold constants and simplify branches in the VM commands before
+                generating code. Defaults to False.
         """
         # remove path and keep only the file | dir name by itself
         program_name = os.path.basename(vm_input)
@@ -15,15 +42,43 @@ class VMTranslator:
         if vm_input.endswith(".vm"): # input is file name
             self.out_filename = os.path.splitext(vm_input)[0] + ".asm"
             # use the user input vm program name as the code writer's name (to be used in static push pop)
-            self.code_writer = CodeWriter(os.path.splitext(program_name)[0])
+            self.code_writer = CodeWriter(os.path.splitext(program_name)[0], trampolines)
             vm_filenames = [vm_input]
         else: # input is dir name
             self.out_filename = os.path.join(vm_input, program_name + ".asm")
-            self.code_writer = CodeWriter("")
-            # grab all the .vm files in the dir
-            vm_filenames = [os.path.join(vm_input, f) for f in os.listdir(vm_input) if f.endswith(".vm")]      
+            self.code_writer = CodeWriter("", trampolines)
+            # grab all the .vm files in the dir, sorted so that the output doesn't depend on the file system order
+            vm_filenames = sorted(os.path.join(vm_input, f) for f in os.listdir(vm_input) if f.endswith(".vm"))
         
         self.vm_filenames = vm_filenames
+        self.optimizer = PeepholeOptimizer() if optimize else None
+        self.compact = compact
+        self.comments = comments
+        self.jobs = jobs
+        self.vm_optimizer = VMOptimizer() if vm_optimize else None
+
+        if cache_dir == "":
+            cache_dir = os.path.join(os.path.dirname(self.out_filename), ".vmcache")
+        self.cache = TranslationCache(cache_dir) if cache_dir is not None else None
+
+        # functions left out of the translation, only known for whole programs, i.e. in directory mode
+        self.dead_functions: Set[str] = set()
+        if link and self.code_writer.name == "":
+            self.dead_functions = find_dead_functions(parse_file(vm_filename) for vm_filename in vm_filenames)
+
+        # the code writer method for each opcode, in opcode order (see `vm_parser`)
+        code_writer = self.code_writer
+        self.dispatch: List[Callable[[VMCommand], str]] = [
+            lambda c: code_writer.write_arithmetic(c.arg1), # C_ARITHMETIC
+            lambda c: code_writer.write_push_pop("push", c.arg1, c.arg2), # C_PUSH
+            lambda c: code_writer.write_push_pop("pop", c.arg1, c.arg2), # C_POP
+            lambda c: code_writer.write_label(c.arg1), # C_LABEL
+            lambda c: code_writer.write_goto(c.arg1), # C_GOTO
+            lambda c: code_writer.write_if(c.arg1), # C_IF
+            lambda c: code_writer.write_function(c.arg1, c.arg2), # C_FUNCTION
+            lambda c: code_writer.write_call(c.arg1, c.arg2), # C_CALL
+            lambda c: code_writer.write_return() # C_RETURN
+        ]
 
 
     def get_command_type(self, command: str) -> str:
@@ -36,26 +91,7 @@ class VMTranslator:
         Returns:
             str: The command type ("C_PUSH", "C_POP", "C_ARITHMETIC", etc.).
         """
-        if command.startswith("push"):
-            return "C_PUSH"
-        if command.startswith("pop"):
-            return "C_POP"
-        if command.startswith(("add", "sub", "neg", "eq", "gt", "lt", "and", "or", "not")):
-            return "C_ARITHMETIC"
-        if command.startswith("label"):
-            return "C_LABEL"
-        if command.startswith("goto"):
-            return "C_GOTO"
-        if command.startswith("if-goto"):
-            return "C_IF"
-        if command.startswith("function"):
-            return "C_FUNCTION"
-        if command.startswith("call"):
-            return "C_CALL"
-        if command.startswith("return"):
-            return "C_RETURN"
-
-        raise ValueError(f"Unknown command: {command}")
+        return COMMAND_TYPES[parse_command(command).opcode]
         
 
     def parse(self) -> None:
@@ -63,53 +99,294 @@ class VMTranslator:
         Parses VM files and translates them into Hack assembly code.
 
         Reads each VM file and generates the corresponding assembly code,
-        which is written to the output file.
+        which is written to the output file through a single buffered writer.
+        """
+        with open(self.out_filename, "w", buffering=OUT_BUFFER_SIZE) as outfile:
+            if self.optimizer: # the optimizer works across commands and files, so it needs the whole stream
+                outfile.writelines(line + "\n" for line in self.generate_asm())
+            else:
+                outfile.writelines(self._generate_chunks())
+
+    def generate_asm(self) -> Iterator[str]:
+        """
+        Translates the VM files into Hack assembly code without writing anything to disk.
+
+        Yields:
+            str: Each line of the generated assembly code, in program order.
+        """
+        if self.optimizer:
+            yield from self.optimizer.optimize(self._generate_raw_asm())
+        else:
+            yield from self._generate_raw_asm()
+
+    def _generate_raw_asm(self) -> Iterator[str]:
+        """
+        Yields each line of the assembly code exactly as `CodeWriter` generates it.
+        """
+        for asm in self._generate_chunks():
+            yield from asm.splitlines()
+
+    def _generate_chunks(self) -> Iterator[str]:
+        """
+        Yields the assembly code of the whole program, one chunk per VM command plus the bootstrap and
+        shared routines, compacted if requested.
         """
         if self.code_writer.name == "": # is dir
-            with open(self.out_filename, "w") as outfile:
-                outfile.write(self.code_writer.write_init())
+            yield self._format(self.code_writer.write_init())
+
+        if self.cache or self.jobs > 1 and len(self.vm_filenames) > 1:
+            yield from self._translate_files()
+        else:
+            for vm_filename in self.vm_filenames:
+                yield from self.translate_file(vm_filename)
+
+        if self.code_writer.trampolines:
+            yield self._format(self.code_writer.write_trampolines())
+
+    def _translate_files(self) -> Iterator[str]:
+        """
+        Translates each VM file into a single chunk, taking it from the cache when possible and
+        translating the others across the worker processes.
+
+        Yields:
+            str: The assembly code of each file, in order.
+        """
+        # files only share the code writer through `set_file_name`, so each one can be translated on its own
+        options = (self.code_writer.trampolines, self.compact, self.comments, self.vm_optimizer is not None,
+                   tuple(sorted(self.dead_functions)))
+        fragments: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+
+        if self.cache:
+            for vm_filename in self.vm_filenames:
+                keys[vm_filename] = self.cache.key(vm_filename, options)
+                entry = self.cache.get(keys[vm_filename])
+                if entry is not None:
+                    fragments[vm_filename], counts = entry
+                    self._add_counts(counts)
+
+        missing = [vm_filename for vm_filename in self.vm_filenames if vm_filename not in fragments]
+
+        if self.jobs > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                # map keeps the order of the files
+                translated = list(executor.map(_translate_file, missing, repeat(options)))
+            for _, counts in translated:
+                self._add_counts(counts)
+        else: # counted by the VM optimizer as they are translated
+            translated = [self.translate_whole_file(vm_filename) for vm_filename in missing]
+
+        for vm_filename, (asm, counts) in zip(missing, translated):
+            fragments[vm_filename] = asm
+            if self.cache:
+                self.cache.put(keys[vm_filename], asm, counts)
+
+        for vm_filename in self.vm_filenames:
+            yield fragments[vm_filename]
+
+    def translate_whole_file(self, vm_filename: str) -> Tuple[str, Tuple[int, int]]:
+        """
+        Translates a single VM file into one chunk of Hack assembly code.
+
+        Args:
+            vm_filename (str): Path to the VM file.
+
+        Returns:
+            Tuple[str, Tuple[int, int]]: The assembly code, and the number of commands the VM optimizer read and
+                removed in the file (0, 0 without it).
+        """
+        vm_optimizer = self.vm_optimizer
+        total, removed = (vm_optimizer.total, vm_optimizer.removed) if vm_optimizer else (0, 0)
+        asm = "".join(self.translate_file(vm_filename))
+        if vm_optimizer:
+            total, removed = vm_optimizer.total - total, vm_optimizer.removed - removed
+
+        return asm, (total, removed)
+
+    def _add_counts(self, counts: Tuple[int, ...]) -> None:
+        """
+        Adds the counts of a file translated elsewhere, i.e. reused from the cache or by a worker process,
+        to the VM optimizer's.
+        """
+        if self.vm_optimizer and counts:
+            total, removed = counts
+            self.vm_optimizer.total += total
+            self.vm_optimizer.removed += removed
+
+    def link_report(self) -> str:
+        """
+        Summarizes how much code was left out by the link step.
+
+        The left out functions are translated on the side, with the same call/return mode, to count the
+        instructions they would have taken.
+        """
+        functions = set()
+        dead_instructions = 0
 
         for vm_filename in self.vm_filenames:
-            # set codewriter's name for each vm file
-            self.code_writer.set_file_name(os.path.splitext(os.path.basename(vm_filename))[0])
-            
-            with open(vm_filename, "r") as infile, open(self.out_filename, "a") as outfile:
-                for key, line in enumerate(infile): # use line num as the key for code writer arithmetic
-                    if line.strip().startswith("//") or not line.strip():
-                        continue # ignore empty line/ comment
-                    
-                    line = line.split("//")[0].strip()
-                    command_type = self.get_command_type(line)
-                    command_components = line.split()
-                    
-                    if command_type == "C_ARITHMETIC": # only 1 component
-                        asm = self.code_writer.write_arithmetic(command_components[0], key)
-                    elif command_type in ("C_PUSH", "C_POP"): 
-                        command, segment, idx = command_components
-                        asm = self.code_writer.write_push_pop(command, segment, idx)
-                    elif command_type == "C_LABEL":
-                        asm = self.code_writer.write_label(command_components[1])
-                    elif command_type == "C_GOTO":
-                        asm = self.code_writer.write_goto(command_components[1])
-                    elif command_type == "C_IF":
-                        asm = self.code_writer.write_if(command_components[1])
-                    elif command_type == "C_FUNCTION":
-                        asm = self.code_writer.write_function(command_components[1], int(command_components[2]))
-                    elif command_type == "C_CALL":
-                        asm = self.code_writer.write_call(command_components[1], int(command_components[2]), key)
-                    elif command_type == "C_RETURN":
-                        asm = self.code_writer.write_return()
-
-                    outfile.write(asm)
+            commands = parse_file(vm_filename)
+            file_functions = {command.arg1 for command in commands if command.opcode == C_FUNCTION}
+            functions |= file_functions
+            if not file_functions & self.dead_functions:
+                continue
+
+            # translate only the dead functions of the file, by leaving out the live ones
+            scratch = VMTranslator(vm_filename, trampolines=self.code_writer.trampolines, compact=True)
+            scratch.dead_functions = file_functions - self.dead_functions
+            asm = "".join(scratch.translate_file(vm_filename))
+            dead_instructions += sum(1 for line in asm.splitlines() if line and line[0] != "(")
+
+        return (f"link: removed {len(self.dead_functions)} of {len(functions)} functions, "
+                f"saving {dead_instructions} instructions")
+
+    def _format(self, asm: str, *commands: VMCommand) -> str:
+        """
+        Applies the compact emission mode to a chunk of generated assembly code.
+
+        Args:
+            asm (str): The generated assembly code.
+            *commands (VMCommand): The VM commands it was generated from, if any.
+
+        Returns:
+            str: The code as is, or compacted and possibly preceded by the VM commands as a comment.
+        """
+        if not self.compact:
+            return asm
+
+        asm = self.code_writer.compact(asm)
+        if self.comments and commands:
+            asm = f"// {' / '.join(map(str, commands))}\n" + asm
+
+        return asm
+
+    def translate_file(self, vm_filename: str) -> Iterator[str]:
+        """
+        Translates a single VM file into Hack assembly code.
+
+        Args:
+            vm_filename (str): Path to the VM file.
+
+        Yields:
+            str: The assembly code generated for each VM command.
+        """
+        # set codewriter's name for each vm file
+        self.code_writer.set_file_name(os.path.splitext(os.path.basename(vm_filename))[0])
+
+        commands = parse_file(vm_filename)
+        if self.dead_functions:
+            commands = strip_functions(commands, self.dead_functions)
+        if self.vm_optimizer:
+            commands = self.vm_optimizer.optimize(commands)
+
+        dispatch = self.dispatch
+        compact = self.compact
+        i = 0
+        while i < len(commands):
+            command = commands[i]
+            # a push followed by a pop or by add/sub can often be done without going through the stack
+            if command.opcode == C_PUSH and i + 1 < len(commands):
+                next_command = commands[i + 1]
+                asm = self._write_pair(command, next_command)
+                if asm is not None:
+                    yield self._format(asm, command, next_command) if compact else asm
+                    i += 2
+                    continue
+
+            asm = dispatch[command.opcode](command)
+            yield self._format(asm, command) if compact else asm
+            i += 1
+
+    def _write_pair(self, push: VMCommand, command: VMCommand) -> Optional[str]:
+        """
+        Generates the code of a push and the command right after it in one go, if `CodeWriter` has a fast path for it.
+
+        Args:
+            push (VMCommand): The push command.
+            command (VMCommand): The command after it.
+
+        Returns:
+            Optional[str]: Generated assembly code, or None if the commands have to be translated one by one.
+        """
+        if command.opcode == C_POP:
+            return self.code_writer.write_move(push.arg1, push.arg2, command.arg1, command.arg2)
+
+        if command.opcode == C_ARITHMETIC and command.arg1 in ("add", "sub") and push.arg1 == "constant":
+            return self.code_writer.write_arithmetic_constant(command.arg1, push.arg2)
+
+        return None
+
+def _translate_file(vm_filename: str, options: Tuple[bool, bool, bool, bool, Tuple[str, ...]]) -> Tuple[str, Tuple[int, int]]:
+    """
+    Translates one file of `VMTranslator._generate_chunks` in a worker process.
+
+    Args:
+        vm_filename (str): Path to the VM file.
+        options (Tuple[bool, bool, bool, bool, Tuple[str, ...]]): The trampolines, compact, comments and vm_optimize
+            options of the translator, and the functions to leave out.
+
+    Returns:
+        Tuple[str, Tuple[int, int]]: The assembly code of the whole file, and the counts of the VM optimizer
+            (see `VMTranslator.translate_whole_file`).
+    """
+    trampolines, compact, comments, vm_optimize, dead_functions = options
+    vm_translator = VMTranslator(vm_filename, trampolines=trampolines, compact=compact, comments=comments,
+                                 vm_optimize=vm_optimize)
+    vm_translator.dead_functions = set(dead_functions)
+    return vm_translator.translate_whole_file(vm_filename)
+
+
+def translate_to_hack(vm_translator: VMTranslator) -> None:
+    """
+    Pipes the generated assembly straight into the project 6 assembler and writes the .hack file.
+    """
+    # the assembler lives in project 6
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "project6", "src"))
+    from assembler import Assembler
+    from symbol_table import init_symbol_table
+
+    hack_filename = os.path.splitext(vm_translator.out_filename)[0] + ".hack"
+    assembler = Assembler(vm_translator.generate_asm(), init_symbol_table(), hack_filename)
+    assembler.parse_single_pass()
+    assembler.write_hack()
+
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python assembler.py <vm-directory | vm-file-path>")
-        sys.exit(1)
-    
+    parser = argparse.ArgumentParser(description="Translates VM code into Hack assembly code.")
+    parser.add_argument("vm_input", help="path to a .vm file or to a directory of .vm files")
+    parser.add_argument("--hack", action="store_true",
+                        help="pipe the assembly straight into the project 6 assembler and write the .hack file, without an intermediate .asm file")
+    parser.add_argument("--optimize", action="store_true", help="remove redundant instructions with a peephole pass")
+    parser.add_argument("--compact", action="store_true",
+                        help="emit one instruction per line, without the indentation, empty lines and comments of the templates")
+    parser.add_argument("--comments", action="store_true", help="with --compact, precede each command's code with the VM command as a comment")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes to translate the .vm files with")
+    parser.add_argument("--cache", nargs="?", const="", metavar="DIR",
+                        help="reuse the code of unchanged .vm files from an on-disk cache (default DIR: .vmcache next to the output)")
+    parser.add_argument("--link", action="store_true",
+                        help="leave out the functions that can't be reached from Sys.init (directory mode only)")
+    parser.add_argument("--vm-optimize", action="store_true",
+                        help="fold constants and simplify branches in the VM commands before generating code")
+    parser.add_argument("--trampolines", action="store_true",
+                        help="share one call and one return routine between all the call sites instead of expanding them inline")
+    args = parser.parse_args()
+
     # assume user input is valid
-    vm_translator = VMTranslator(sys.argv[1])
-    vm_translator.parse()
+    vm_translator = VMTranslator(args.vm_input, args.optimize, args.trampolines, args.compact, args.comments, args.jobs,
+                                 args.cache, args.link, args.vm_optimize)
+
+    if not args.hack:
+        vm_translator.parse()
+    else:
+        translate_to_hack(vm_translator)
+
+    if vm_translator.optimizer:
+        print(vm_translator.optimizer.report())
+    if vm_translator.vm_optimizer:
+        print(vm_translator.vm_optimizer.report())
+    if vm_translator.cache:
+        print(vm_translator.cache.report())
+    if args.link:
+        print(vm_translator.link_report())
 
 
 if __name__ == "__main__":
@@ -1,12 +1,22 @@
+import re
+from typing import Optional
+
+_COMMENT = re.compile(r"//[^\n]*")
+
+
 class CodeWriter:
-    def __init__(self, name: str):
+    def __init__(self, name: str, trampolines: bool = False):
         """
         Initializes the CodeWriter with segment mappings and code snippets.
 
         Args:
             name (str): The basename of the output program.
+            trampolines (bool, optional): Whether calls and returns jump to the shared routines of `write_trampolines`
+                instead of being expanded inline. Defaults to False.
         """
         self.name = name # used for static segment symbols
+        self.trampolines = trampolines
+        self.label_count = 0 # numbers the generated labels, restarted for each file
 
         self.operator_lookup = {
             "add": "+",
@@ -68,16 +78,58 @@ class CodeWriter:
         M=M+1
         '''
 
+        # push the D register: increment the stack pointer and write below it in one go
+        # used by the fast paths, 4 instructions instead of PUT_D_IN_STACK + INCREMENT_STACK_POINTER's 5
+        # affects all CPU registers
+        self.PUSH_D = '''
+        @SP
+        AM=M+1
+        A=A-1
+        M=D
+        '''
+
+        # pop the top of the stack to the D register, 3 instructions instead of POP_STACK_TO_D's 4
+        # affects all CPU registers
+        self.POP_D = '''
+        @SP
+        AM=M-1
+        D=M
+        '''
+
+    @staticmethod
+    def compact(asm: str) -> str:
+        """
+        Strips the indentation, comments and empty lines of the generated templates.
+
+        Args:
+            asm (str): Assembly code as returned by the write methods.
+
+        Returns:
+            str: The same code with one instruction or label per line.
+        """
+        # Hack instructions and labels never contain whitespace, so splitting on it leaves exactly the code
+        return "\n".join(_COMMENT.sub("", asm).split()) + "\n"
+
     def set_file_name(self, name: str) -> None:
         self.name = name
+        # labels are prefixed with the file name, so the numbering only has to be unique within the file
+        # and the code of a file doesn't depend on what was translated before it
+        self.label_count = 0
 
-    def write_arithmetic(self, command: str, key: int) -> str:
+    def _next_key(self) -> int:
+        """
+        Returns a new unique key for the labels of the current file.
+        """
+        key = self.label_count
+        self.label_count += 1
+        return key
+
+    def write_arithmetic(self, command: str) -> str:
         """
         Generates Hack assembly code for the specified VM command.
 
         Args:
             command (str): Arithmetic command ("add", "sub", "and", "or", "neg", "not", "eq", "gt", "lt").
-            key (int): Unique key for labeling conditional jumps.
         Returns:
             str: Generated assembly code.
         """
@@ -113,6 +165,7 @@ class CodeWriter:
             '''
             
         else: # command in ("eq", "gt", "lt"):
+            key = self._next_key() # to label the conditional jumps
             asm = f'''
             {self.POP_STACK_TO_D}
 
@@ -152,6 +205,10 @@ class CodeWriter:
         Returns:
             str: Generated assembly code.
         """
+        fast_asm = self._write_push_pop_fast(command, segment, idx)
+        if fast_asm is not None:
+            return fast_asm
+
         if command == "push":
             if segment == "constant":
                 asm = f'''
@@ -257,10 +314,169 @@ class CodeWriter:
                 '''
 
         return asm
-    
+
+    def _write_push_pop_fast(self, command: str, segment: str, idx: int) -> Optional[str]:
+        """
+        Generates shorter code for the push and pop commands that don't need the generic templates:
+        pushing the constants 0 and 1, and the locations that can be addressed without computing base+idx.
+
+        Args:
+            command (str): Command type ("push" or "pop").
+            segment (str): Segment name.
+            idx (int): Index for the push/pop operation.
+
+        Returns:
+            Optional[str]: Generated assembly code, or None if the generic template has to be used.
+        """
+        if command == "push" and segment == "constant":
+            if idx not in (0, 1): # also rules out the labels pushed by write_call
+                return None
+
+            asm = f'''
+            @SP
+            AM=M+1
+            A=A-1
+            M={idx}
+            '''
+
+            return asm
+
+        if command == "push":
+            load = self._load_d_direct(segment, idx)
+            return load + self.PUSH_D if load is not None else None
+
+        store = self._store_d(segment, idx)
+        return self.POP_D + store if store is not None else None
+
+    def _load_d_direct(self, segment: str, idx: int) -> Optional[str]:
+        """
+        Generates the code loading a segment location into D without computing base+idx, if there is one.
+        """
+        if segment in ("local", "argument", "this", "that") and idx in (0, 1):
+            # the base address is the location itself for idx 0, and A=M+1 reaches idx 1
+            asm = f'''
+            @{self.mem_pointer_lookup[segment]}
+            A={"M" if idx == 0 else "M+1"}
+            D=M
+            '''
+        elif segment in ("pointer", "temp"):
+            asm = f'''
+            @{self.mem_pointer_lookup[segment] + int(idx)}
+            D=M
+            '''
+        elif segment == "static":
+            asm = f'''
+            @{self.name}.{idx}
+            D=M
+            '''
+        else:
+            return None
+
+        return asm
+
+    def _load_d(self, segment: str, idx: int) -> str:
+        """
+        Generates the code loading a segment location (or a constant) into D.
+        """
+        load = self._load_d_direct(segment, idx)
+        if load is not None:
+            return load
+
+        if segment == "constant":
+            asm = f'''
+            @{idx}
+            D=A
+            '''
+        else: # local | argument | this | that
+            asm = f'''
+            @{self.mem_pointer_lookup[segment]}
+            D=M
+            @{idx}
+            A=D+A
+            D=M
+            '''
+
+        return asm
+
+    def _store_d(self, segment: str, idx: int) -> Optional[str]:
+        """
+        Generates the code storing D to a segment location without computing base+idx, if there is one.
+        Computing base+idx would need D, so the other locations go through R13 in the generic pop template.
+        """
+        if segment in ("local", "argument", "this", "that") and idx in (0, 1):
+            asm = f'''
+            @{self.mem_pointer_lookup[segment]}
+            A={"M" if idx == 0 else "M+1"}
+            M=D
+            '''
+        elif segment in ("pointer", "temp"):
+            asm = f'''
+            @{self.mem_pointer_lookup[segment] + int(idx)}
+            M=D
+            '''
+        elif segment == "static":
+            asm = f'''
+            @{self.name}.{idx}
+            M=D
+            '''
+        else:
+            return None
+
+        return asm
+
+    def write_move(self, src_segment: str, src_idx: int, dst_segment: str, dst_idx: int) -> Optional[str]:
+        """
+        Generates Hack assembly code for a push immediately followed by a pop, e.g. `push temp 0 / pop that 0`,
+        which moves the value through D without going through the stack.
+
+        Args:
+            src_segment (str): Segment name of the push.
+            src_idx (int): Index of the push.
+            dst_segment (str): Segment name of the pop.
+            dst_idx (int): Index of the pop.
+
+        Returns:
+            Optional[str]: Generated assembly code, or None if the pop location needs base+idx to be computed.
+        """
+        store = self._store_d(dst_segment, dst_idx)
+        if store is None:
+            return None
+
+        return self._load_d(src_segment, src_idx) + store
+
+    def write_arithmetic_constant(self, command: str, value: int) -> str:
+        """
+        Generates Hack assembly code for `push constant value` immediately followed by add or sub,
+        e.g. the offset of an array access, which updates the top of the stack in place.
+
+        Args:
+            command (str): Arithmetic command ("add" or "sub").
+            value (int): The pushed constant.
+
+        Returns:
+            str: Generated assembly code.
+        """
+        op = self.operator_lookup[command]
+
+        if value == 1: # no need for D
+            asm = f'''
+            @SP
+            A=M-1
+            M=M{op}1
+            '''
+        else:
+            asm = f'''
+            @{value}
+            D=A
+            @SP
+            A=M-1
+            M={"D+M" if command == "add" else "M-D"}
+            '''
+
+        return asm
 
     def write_label(self, label: str) -> str:
-        asm = f"({self.name}${label})"
+        asm = f"({self.name}${label})\n"
 
         return asm
 
@@ -308,7 +524,7 @@ class CodeWriter:
 
         return asm
     
-    def write_call(self, function_name: str, num_args: int, key: int) -> str:
+    def write_call(self, function_name: str, num_args: int) -> str:
         # push return-address
         # push LCL
         # push ARG
@@ -318,6 +534,28 @@ class CodeWriter:
         # LCL = SP
         # goto f
 
+        key = self._next_key() # to label the return address
+        if self.trampolines:
+            # hand the function address, n and the return address over to the shared $$CALL routine
+            asm = f'''
+            @{function_name}
+            D=A
+            @R13
+            M=D
+            @{num_args}
+            D=A
+            @R14
+            M=D
+            @{self.name}$RETURN.{key}
+            D=A
+            @$$CALL
+            0;JMP
+
+            ({self.name}$RETURN.{key})
+            '''
+
+            return asm
+
         asm = f'''
         {self.write_push_pop("push", "constant", f"{self.name}$RETURN.{key}")}
 
@@ -377,6 +615,17 @@ class CodeWriter:
         # ARG = *(FRAME-3)
         # LCL = *(FRAME-4)
         # goto RET
+        if self.trampolines:
+            asm = '''
+            @$$RETURN
+            0;JMP
+            '''
+
+            return asm
+
+        return self._write_return_body()
+
+    def _write_return_body(self) -> str:
         asm = f'''
         // save lcl/frame address to R15
         @LCL
@@ -438,7 +687,70 @@ class CodeWriter:
         @SP
         M=D
         
-        {self.write_call("Sys.init", 0, 0)}
+        {self.write_call("Sys.init", 0)}
         '''
 
-        return asm
\ No newline at end of file
+        return asm
+
+    def write_trampolines(self) -> str:
+        # the routines shared by all the call sites and returns when trampolines are on
+        # they go at the very end of the program, behind a halt loop so that execution never falls into them
+        #
+        # $$CALL expects the return address in D, the function address in R13 and n in R14
+        # and builds the same frame as an inline call
+        asm = f'''
+        ($$END)
+        @$$END
+        0;JMP
+
+        ($$CALL)
+        // push return-address
+        @SP
+        A=M
+        M=D
+
+        // push LCL, ARG, THIS, THAT
+        @LCL
+        D=M
+        @SP
+        AM=M+1
+        M=D
+        @ARG
+        D=M
+        @SP
+        AM=M+1
+        M=D
+        @THIS
+        D=M
+        @SP
+        AM=M+1
+        M=D
+        @THAT
+        D=M
+        @SP
+        AM=M+1
+        M=D
+
+        // lcl = sp
+        @SP
+        MD=M+1
+        @LCL
+        M=D
+
+        // arg = sp-n-5
+        @R14
+        D=D-M
+        @5
+        D=D-A
+        @ARG
+        M=D
+
+        @R13
+        A=M
+        0;JMP
+
+        ($$RETURN)
+        {self._write_return_body()}
+        '''
+
+        return asm
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List, Optional, Set
+from vm_parser import VMCommand, C_FUNCTION, C_CALL
+
+
+def find_dead_functions(files: Iterable[Iterable[VMCommand]], entry: str = "Sys.init") -> Set[str]:
+    """
+    Finds the functions of a whole program that can never run.
+
+    Builds the call graph from the `function` and `call` commands and walks it from the entry function.
+    Functions are only ever reached through `call`, so everything the walk doesn't visit is dead. Calls made
+    outside of any function (before the first `function` command of a file) are treated as roots too.
+
+    Args:
+        files (Iterable[Iterable[VMCommand]]): The commands of each file of the program.
+        entry (str, optional): The function the program starts with. Defaults to "Sys.init".
+
+    Returns:
+        Set[str]: The names of the dead functions. Empty if the entry function isn't defined, as the program
+            then isn't whole.
+    """
+    calls: Dict[Optional[str], Set[str]] = {None: set()} # caller -> callees, None for code outside of functions
+
+    for commands in files:
+        current: Optional[str] = None # a function never runs into the next file
+        for command in commands:
+            if command.opcode == C_FUNCTION:
+                current = command.arg1
+                calls.setdefault(current, set())
+            elif command.opcode == C_CALL:
+                calls[current].add(command.arg1)
+
+    if entry not in calls:
+        return set()
+
+    reachable = {entry, *calls[None]}
+    pending = list(reachable)
+    while pending:
+        for callee in calls.get(pending.pop(), ()):
+            if callee not in reachable:
+                reachable.add(callee)
+                pending.append(callee)
+
+    return set(calls) - reachable - {None}
+
+
+def strip_functions(commands: Iterable[VMCommand], dead_functions: Set[str]) -> List[VMCommand]:
+    """
+    Removes functions from the commands of a file.
+
+    Args:
+        commands (Iterable[VMCommand]): The commands of the file.
+        dead_functions (Set[str]): The names of the functions to remove.
+
+    Returns:
+        List[VMCommand]: The remaining commands.
+    """
+    kept = []
+    dead = False
+
+    for command in commands:
+        if command.opcode == C_FUNCTION: # a function runs until the next one
+            dead = command.arg1 in dead_functions
+        if not dead:
+            kept.append(command)
+
+    return kept
@@ -0,0 +1,129 @@
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# what the optimizer knows the A register holds:
+# None (unknown) | "X" (the address of symbol/constant X, after @X) | ("*", "X") (the value of RAM[X], after @X A=M)
+AState = Union[None, str, Tuple[str, str]]
+
+# M=M+1 / M=M-1 on the same register cancel out
+_INVERSE = {"M=M+1": "M=M-1", "M=M-1": "M=M+1"}
+
+
+class PeepholeOptimizer:
+    """
+    Removes redundant instructions from the Hack assembly generated by `CodeWriter`.
+
+    Each command is generated on its own, so consecutive commands often undo each other, e.g. a push followed
+    by a pop writes the stack and reads it right back. The optimizer tracks what the A and D registers are known
+    to hold and drops:
+        - `@X` when A already holds X,
+        - `@X A=M` when A already holds RAM[X], e.g. the pop re-reading the address the push just used,
+        - `D=M` when D already equals M, e.g. after the push wrote M=D,
+        - `M=M+1 M=M-1` pairs, e.g. the `@SP M=M+1 / @SP M=M-1` of a push followed by a pop.
+
+    Knowledge is reset at every label, since a label can be jumped to from anywhere. Writes to RAM are assumed
+    not to modify the SP register unless they address it directly, which holds as SP never points to itself.
+
+    Attributes:
+        total (int): Number of instructions read.
+        removed (int): Number of instructions removed.
+    """
+    def __init__(self):
+        self.total = 0
+        self.removed = 0
+
+    def optimize(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Optimizes a stream of assembly lines.
+
+        Args:
+            lines (Iterable[str]): Lines of Hack assembly, possibly with indentation, comments and empty lines.
+
+        Yields:
+            str: The optimized instructions and labels, one per line, without comments.
+        """
+        # emitted lines that can still be taken back, with the (A, D) knowledge from right before each of them
+        window: List[Tuple[str, AState, AState]] = []
+        a: AState = None
+        d_is_m: AState = None # the A state at which D == M is known to hold
+
+        for line in lines:
+            line = line.split("//")[0].strip()
+            if not line:
+                continue
+
+            if line[0] == "(": # label
+                window.append((line, a, d_is_m))
+                a = d_is_m = None
+            else:
+                self.total += 1
+                a, d_is_m = self._emit(line, window, a, d_is_m)
+
+            # only the last two lines can ever be taken back
+            while len(window) > 2:
+                yield window.pop(0)[0]
+
+        for line, _, _ in window:
+            yield line
+
+    def _emit(self, inst: str, window: List[Tuple[str, AState, AState]], a: AState, d_is_m: AState) -> Tuple[AState, AState]:
+        """
+        Emits an instruction into the window, unless it is redundant.
+
+        Args:
+            inst (str): The instruction.
+            window (List[Tuple[str, AState, AState]]): The lines that can still be taken back.
+            a (AState): What A holds before the instruction.
+            d_is_m (AState): The A state at which D == M holds before the instruction.
+
+        Returns:
+            Tuple[AState, AState]: The knowledge after the instruction.
+        """
+        last = window[-1] if window else None
+
+        if inst[0] == "@": # A-instruction
+            if a == inst[1:]:
+                self.removed += 1
+                return a, d_is_m
+            window.append((inst, a, d_is_m))
+            return inst[1:], d_is_m
+
+        if last and _INVERSE.get(inst) == last[0]: # undoes the previous instruction
+            window.pop()
+            self.removed += 2
+            return last[1], last[2]
+
+        if inst == "A=M" and last and last[0][0] == "@" and last[1] == ("*", last[0][1:]): # A already holds RAM[X]
+            window.pop()
+            self.removed += 2
+            return last[1], last[2]
+
+        if inst == "D=M" and a is not None and d_is_m == a:
+            self.removed += 1
+            return a, d_is_m
+
+        window.append((inst, a, d_is_m))
+        dest, comp = inst.split(";")[0].split("=") if "=" in inst else ("", None)
+
+        if "M" in dest and a.__class__ is tuple and a[1] != "SP":
+            a = None # wrote through a pointer that could point anywhere, even at the registers we know about
+
+        if "D" in dest and "M" in dest:
+            d_is_m = a
+        elif "D" in dest:
+            d_is_m = a if comp == "M" else None
+        elif "M" in dest:
+            d_is_m = a if comp == "D" else None
+
+        if dest == "A" and comp == "M" and a.__class__ is str:
+            a = ("*", a)
+        elif "A" in dest:
+            a = None
+
+        return a, d_is_m
+
+    def report(self) -> str:
+        """
+        Summarizes how many instructions were removed.
+        """
+        percent = self.removed / self.total if self.total else 0
+        return f"peephole: removed {self.removed} of {self.total} instructions ({percent:.1%})"
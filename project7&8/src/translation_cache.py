@@ -0,0 +1,118 @@
+import os, hashlib, tempfile
+from typing import Optional, Tuple
+
+# the modules whose code ends up in the generated assembly: editing any of them invalidates the cache
+TRANSLATOR_SOURCES = (
+    "code_writer.py", "vm_parser.py", "vm_optimizer.py", "linker.py", "VMTranslator.py", "translation_cache.py"
+)
+
+
+def translator_version() -> str:
+    """
+    Fingerprints the translator itself, so that cached code never outlives the code that generated it.
+
+    Returns:
+        str: A hash of the translator's source files.
+    """
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for source in TRANSLATOR_SOURCES:
+        with open(os.path.join(src_dir, source), "rb") as infile:
+            digest.update(infile.read())
+
+    return digest.hexdigest()
+
+
+class TranslationCache:
+    """
+    On-disk cache of the assembly code generated for single VM files.
+
+    Each entry is a file named after the hash of everything the code depends on: the content of the VM file,
+    its name (which prefixes its labels and static symbols), the translator version and the options. Since
+    labels are numbered per file, the code of a file never depends on the other files, and cached code can be
+    spliced back into any program. The counts the translator reports about the file, e.g. the commands removed
+    by the VM optimizer, are stored on the first line of the entry, so that reports still cover reused files.
+
+    Attributes:
+        cache_dir (str): Directory holding the entries.
+        version (str): The translator version the entries are keyed on.
+        hits (int): Number of files found in the cache.
+        misses (int): Number of files that had to be translated.
+    """
+    def __init__(self, cache_dir: str):
+        """
+        Opens the cache, creating its directory if needed.
+
+        Args:
+            cache_dir (str): Directory holding the entries.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.version = translator_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, vm_filename: str, options: Tuple[bool, ...]) -> str:
+        """
+        Computes the key of a VM file's code.
+
+        Args:
+            vm_filename (str): Path to the VM file.
+            options (Tuple[bool, ...]): The translator options that change the generated code.
+
+        Returns:
+            str: The key.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}\0{os.path.basename(vm_filename)}\0{options}\0".encode())
+
+        with open(vm_filename, "rb") as infile:
+            digest.update(infile.read())
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, Tuple[int, ...]]]:
+        """
+        Looks up the code stored under a key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            Optional[Tuple[str, Tuple[int, ...]]]: The cached code and its counts, or None if there is none.
+        """
+        try:
+            with open(os.path.join(self.cache_dir, key + ".asm"), "r") as infile:
+                counts = tuple(map(int, infile.readline().split()))
+                asm = infile.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return asm, counts
+
+    def put(self, key: str, asm: str, counts: Tuple[int, ...] = ()) -> None:
+        """
+        Stores code under a key.
+
+        The entry is written to a temporary file which is then renamed, so that a concurrent or interrupted
+        translation never leaves a partial entry behind.
+
+        Args:
+            key (str): The key.
+            asm (str): The code.
+            counts (Tuple[int, ...], optional): The counts reported about the code. Defaults to ().
+        """
+        fd, tmp_filename = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as outfile:
+            outfile.write(" ".join(map(str, counts)) + "\n")
+            outfile.write(asm)
+        os.replace(tmp_filename, os.path.join(self.cache_dir, key + ".asm"))
+
+    def report(self) -> str:
+        """
+        Summarizes how many files were reused from the cache.
+        """
+        return f"cache: reused {self.hits} of {self.hits + self.misses} files"
@@ -0,0 +1,289 @@
+import os, argparse
+from array import array
+from typing import Dict, List, Optional, Tuple
+from VMTranslator import VMTranslator
+from vm_parser import VMCommand, C_ARITHMETIC, C_PUSH, C_LABEL, C_GOTO, C_IF, C_FUNCTION, C_CALL, C_RETURN, parse_file, wrap
+
+RAM_SIZE = 32768
+# return addresses are stored in 16-bit RAM words, so command indices have to fit in 16 bits too
+MAX_PROGRAM_SIZE = 1 << 16
+
+# opcodes of the pre-parsed program, each command is an (opcode, x, y) tuple
+PUSH_CONSTANT = 0 # x: value
+PUSH_SEGMENT = 1 # x: address of the segment's base pointer (LCL, ARG, THIS, THAT), y: index
+PUSH_FIXED = 2 # x: RAM address (pointer, temp, static)
+POP_SEGMENT = 3 # x: address of the segment's base pointer, y: index
+POP_FIXED = 4 # x: RAM address
+ADD = 5
+SUB = 6
+NEG = 7
+EQ = 8
+GT = 9
+LT = 10
+AND = 11
+OR = 12
+NOT = 13
+GOTO = 14 # x: command index
+IF_GOTO = 15 # x: command index
+FUNCTION = 16 # x: number of locals
+CALL = 17 # x: command index of the function, y: number of args
+RETURN = 18
+BOOTSTRAP = 19 # x: initial SP
+
+Command = Tuple[int, int, int]
+
+_ARITHMETIC_OPCODES = {"add": ADD, "sub": SUB, "neg": NEG, "eq": EQ, "gt": GT, "lt": LT, "and": AND, "or": OR, "not": NOT}
+_SEGMENT_POINTERS = {"local": 1, "argument": 2, "this": 3, "that": 4}
+_FIXED_SEGMENT_BASES = {"pointer": 3, "temp": 5}
+
+
+class VMInterpreter:
+    """
+    Runs VM programs directly, without translating them to Hack assembly.
+
+    Each .vm file is parsed once into a list of integer-opcode commands whose labels, functions and static
+    variables are already resolved, which then run against a RAM array laid out exactly like the one of the
+    translated program: the stack starts at 256 with SP/LCL/ARG/THIS/THAT in RAM[0-4], statics are allocated
+    from RAM[16] in order of first use, and call frames are stored on the stack. The only differences are
+    that return addresses saved in call frames are command indices instead of ROM addresses (stored as unsigned
+    16-bit words), and that the R13-R15 scratch registers used by the generated assembly are never touched.
+
+    Attributes:
+        program (List[Command]): The parsed commands of all the VM files.
+        functions (Dict[str, int]): Function names to the index of their `function` command.
+        statics (Dict[str, int]): Static variable symbols (`File.i`) to their RAM address.
+        ram (array): The RAM, as signed 16-bit words.
+        pc (int): The index of the next command to execute.
+        steps (int): Number of commands executed so far.
+        halted (bool): Whether the program reached its end or an infinite `goto` to itself.
+    """
+    def __init__(self, vm_input: str):
+        """
+        Loads and parses a VM program.
+
+        Args:
+            vm_input (str): Path to the input VM file or directory containing VM files.
+        """
+        # use the translator to pick the files, so both accept the same input
+        self.translator = VMTranslator(vm_input)
+        self.program: List[Command] = []
+        self.functions: Dict[str, int] = {}
+        self.statics: Dict[str, int] = {}
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.pc = 0
+        self.steps = 0
+        self.halted = False
+
+        self._load()
+
+    def _load(self) -> None:
+        """
+        Parses every VM file into `program`, then resolves jump and call targets into command indices.
+
+        Raises:
+            ValueError: If the program has more commands than return addresses can point to.
+        """
+        labels: Dict[str, int] = {} # file-scoped label (File$label) -> command index
+        unresolved: List[Tuple[int, str]] = [] # (command index, label or function name)
+
+        if self.translator.code_writer.name == "": # is dir: same bootstrap as `CodeWriter.write_init`
+            self.program.append((BOOTSTRAP, 256, 0))
+            unresolved.append((len(self.program), "Sys.init"))
+            self.program.append((CALL, -1, 0))
+
+        for vm_filename in self.translator.vm_filenames:
+            file_name = os.path.splitext(os.path.basename(vm_filename))[0]
+
+            for vm_command in parse_file(vm_filename):
+                opcode = vm_command.opcode
+
+                if opcode == C_LABEL: # labels take no command, they point to the next one
+                    labels[f"{file_name}${vm_command.arg1}"] = len(self.program)
+                    continue
+
+                if opcode == C_GOTO or opcode == C_IF:
+                    unresolved.append((len(self.program), f"{file_name}${vm_command.arg1}"))
+                    command = (GOTO if opcode == C_GOTO else IF_GOTO, -1, 0)
+                elif opcode == C_CALL:
+                    unresolved.append((len(self.program), vm_command.arg1))
+                    command = (CALL, -1, vm_command.arg2)
+                elif opcode == C_FUNCTION:
+                    self.functions[vm_command.arg1] = len(self.program)
+                    command = (FUNCTION, vm_command.arg2, 0)
+                elif opcode == C_RETURN:
+                    command = (RETURN, 0, 0)
+                elif opcode == C_ARITHMETIC:
+                    command = (_ARITHMETIC_OPCODES[vm_command.arg1], 0, 0)
+                else: # C_PUSH | C_POP
+                    command = self._parse_push_pop(file_name, vm_command)
+
+                self.program.append(command)
+
+        if len(self.program) > MAX_PROGRAM_SIZE:
+            raise ValueError(f"Program too large: {len(self.program)} commands, at most {MAX_PROGRAM_SIZE} are supported")
+
+        for idx, target in unresolved:
+            opcode, _, y = self.program[idx]
+            address = self.functions[target] if opcode == CALL else labels[target]
+            self.program[idx] = (opcode, address, y)
+
+    def _parse_push_pop(self, file_name: str, vm_command: VMCommand) -> Command:
+        """
+        Turns a push or pop command into its opcode and resolved operands.
+
+        Args:
+            file_name (str): Name of the VM file, used for static segment symbols.
+            vm_command (VMCommand): The parsed push or pop command.
+
+        Returns:
+            Command: The command to run.
+        """
+        push = vm_command.opcode == C_PUSH
+        segment, idx = vm_command.arg1, vm_command.arg2
+
+        if segment == "constant":
+            return (PUSH_CONSTANT, idx, 0)
+
+        if segment in _SEGMENT_POINTERS:
+            return (PUSH_SEGMENT if push else POP_SEGMENT, _SEGMENT_POINTERS[segment], idx)
+
+        if segment == "static":
+            # same as the assembler: the next free RAM register from 16, the first time the symbol is used
+            symbol = f"{file_name}.{idx}"
+            address = self.statics.setdefault(symbol, 16 + len(self.statics))
+        else: # pointer | temp
+            address = _FIXED_SEGMENT_BASES[segment] + idx
+
+        return (PUSH_FIXED if push else POP_FIXED, address, 0)
+
+    def run(self, max_steps: Optional[int] = None) -> int:
+        """
+        Runs the program until it halts or until the step budget is used up.
+
+        Args:
+            max_steps (Optional[int]): Max number of VM commands to execute. Runs until halt if None.
+
+        Returns:
+            int: Number of commands executed by this call.
+        """
+        program = self.program
+        ram = self.ram
+        pc = self.pc
+        sp = ram[0] # SP is kept in a local and written back to RAM[0] when the run stops
+        budget = max_steps if max_steps is not None else -1
+        executed = 0
+
+        while executed != budget:
+            try:
+                opcode, x, y = program[pc]
+            except IndexError: # ran past the end of the program
+                self.halted = True
+                break
+            executed += 1
+            pc += 1
+
+            if opcode == PUSH_CONSTANT:
+                ram[sp] = x
+                sp += 1
+            elif opcode == PUSH_SEGMENT:
+                ram[sp] = ram[(ram[x] + y) & 0x7FFF]
+                sp += 1
+            elif opcode == PUSH_FIXED:
+                ram[sp] = ram[x]
+                sp += 1
+            elif opcode == POP_SEGMENT:
+                sp -= 1
+                ram[(ram[x] + y) & 0x7FFF] = ram[sp]
+            elif opcode == POP_FIXED:
+                sp -= 1
+                ram[x] = ram[sp]
+            elif opcode == ADD:
+                sp -= 1
+                ram[sp - 1] = wrap(ram[sp - 1] + ram[sp])
+            elif opcode == SUB:
+                sp -= 1
+                ram[sp - 1] = wrap(ram[sp - 1] - ram[sp])
+            elif opcode == NEG:
+                ram[sp - 1] = wrap(-ram[sp - 1])
+            elif opcode == NOT:
+                ram[sp - 1] = ~ram[sp - 1]
+            elif opcode == AND:
+                sp -= 1
+                ram[sp - 1] = ram[sp - 1] & ram[sp]
+            elif opcode == OR:
+                sp -= 1
+                ram[sp - 1] = ram[sp - 1] | ram[sp]
+            elif opcode <= LT: # EQ | GT | LT
+                # like the generated assembly, compare the wrapped difference x - y with 0
+                sp -= 1
+                diff = wrap(ram[sp - 1] - ram[sp])
+                if opcode == EQ:
+                    ram[sp - 1] = -1 if diff == 0 else 0
+                elif opcode == GT:
+                    ram[sp - 1] = -1 if diff > 0 else 0
+                else:
+                    ram[sp - 1] = -1 if diff < 0 else 0
+            elif opcode == GOTO:
+                if x == pc - 1: # `label L / goto L`: the program is stuck here for good
+                    self.halted = True
+                    break
+                pc = x
+            elif opcode == IF_GOTO:
+                sp -= 1
+                if ram[sp]:
+                    pc = x
+            elif opcode == FUNCTION:
+                for _ in range(x):
+                    ram[sp] = 0
+                    sp += 1
+            elif opcode == CALL: # same frame as `CodeWriter.write_call`
+                ram[sp] = wrap(pc) # the index as a signed word
+                ram[sp + 1] = ram[1]
+                ram[sp + 2] = ram[2]
+                ram[sp + 3] = ram[3]
+                ram[sp + 4] = ram[4]
+                sp += 5
+                ram[2] = sp - y - 5
+                ram[1] = sp
+                pc = x
+            elif opcode == RETURN:
+                frame = ram[1]
+                return_idx = ram[frame - 5] & 0xFFFF
+                ram[ram[2]] = ram[sp - 1]
+                sp = ram[2] + 1
+                ram[4] = ram[frame - 1]
+                ram[3] = ram[frame - 2]
+                ram[2] = ram[frame - 3]
+                ram[1] = ram[frame - 4]
+                pc = return_idx
+            else: # BOOTSTRAP
+                sp = x
+
+        ram[0] = sp
+        self.pc = pc
+        self.steps += executed
+
+        return executed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a VM program directly, without translating it to Hack assembly.")
+    parser.add_argument("vm_input", help="path to a .vm file or to a directory of .vm files")
+    parser.add_argument("--steps", type=int, help="max number of VM commands to execute (default: run until halt)")
+    parser.add_argument("--ram", nargs=2, type=int, metavar=("START", "END"), help="print RAM[START:END] after the run")
+    args = parser.parse_args()
+
+    # assume user input is valid
+    interpreter = VMInterpreter(args.vm_input)
+    interpreter.run(args.steps)
+
+    status = "halted" if interpreter.halted else "stopped"
+    print(f"{os.path.basename(os.path.normpath(args.vm_input))}: {status} after {interpreter.steps} commands")
+    if args.ram:
+        start, end = args.ram
+        for address in range(start, end):
+            print(f"RAM[{address}] = {interpreter.ram[address]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os, argparse
+from typing import Iterable, List
+from vm_parser import VMCommand, C_ARITHMETIC, C_PUSH, C_POP, C_LABEL, C_GOTO, C_IF, C_FUNCTION, C_RETURN, parse_file, wrap
+
+# constant folding, with the same 16-bit semantics as the generated assembly
+_UNARY = {
+    "neg": lambda x: wrap(-x),
+    "not": lambda x: ~x
+}
+_BINARY = {
+    "add": lambda x, y: wrap(x + y),
+    "sub": lambda x, y: wrap(x - y),
+    "and": lambda x, y: x & y,
+    "or": lambda x, y: x | y,
+    # comparisons look at the sign of the wrapped difference, like `CodeWriter.write_arithmetic`
+    "eq": lambda x, y: -1 if wrap(x - y) == 0 else 0,
+    "gt": lambda x, y: -1 if wrap(x - y) > 0 else 0,
+    "lt": lambda x, y: -1 if wrap(x - y) < 0 else 0
+}
+# x op c == x
+_IDENTITIES = {("add", 0), ("sub", 0), ("or", 0), ("and", -1)}
+
+
+class VMOptimizer:
+    """
+    Rewrites VM commands into fewer commands with the same effect.
+
+    Works on the commands of one file at a time, within basic blocks (a label or function starts a new one):
+        - constant arithmetic is folded, e.g. `push constant 1 / neg / not` (~true) becomes `push constant 0`,
+        - arithmetic with a neutral constant is dropped, e.g. `push constant 0 / add`,
+        - `not / not` and `neg / neg` cancel out,
+        - `eq / not / if-goto L` becomes `sub / if-goto L`, as x - y is nonzero exactly when x != y,
+        - `if-goto` on a constant becomes a `goto` or nothing, e.g. the exit test of `while (true)`,
+        - `push X / pop X` is dropped,
+        - `goto L / label L` becomes `label L`,
+        - commands after a `goto` or `return` are dropped until the next label, as nothing can reach them.
+
+    Folded constants are kept as plain values while optimizing and turned back into commands at the end,
+    as `push constant` only takes 0-32767: -n becomes `push constant n / neg`.
+
+    Attributes:
+        total (int): Number of commands read.
+        removed (int): Number of commands removed.
+    """
+    def __init__(self):
+        self.total = 0
+        self.removed = 0
+
+    def optimize(self, commands: Iterable[VMCommand]) -> List[VMCommand]:
+        """
+        Optimizes the commands of a file.
+
+        Args:
+            commands (Iterable[VMCommand]): The commands.
+
+        Returns:
+            List[VMCommand]: The optimized commands.
+        """
+        out: List[VMCommand] = []
+        block_start = 0 # commands before this index belong to previous blocks and are never rewritten
+        reachable = True
+        total = 0
+
+        for command in commands:
+            total += 1
+            opcode = command.opcode
+
+            if opcode == C_LABEL or opcode == C_FUNCTION:
+                if opcode == C_LABEL and len(out) > block_start and out[-1].opcode == C_GOTO and out[-1].arg1 == command.arg1:
+                    out.pop() # jump to the next command
+                out.append(command)
+                block_start = len(out)
+                reachable = True
+                continue
+
+            if not reachable:
+                continue
+
+            if opcode == C_ARITHMETIC:
+                self._arithmetic(command, out, block_start)
+            elif opcode == C_IF:
+                self._if_goto(command, out, block_start)
+                reachable = out[-1].opcode != C_GOTO if len(out) > block_start else True
+            elif opcode == C_POP and len(out) > block_start and out[-1].opcode == C_PUSH \
+                    and out[-1][1:3] == command[1:3] and command.arg1 != "constant":
+                out.pop() # push X / pop X
+            else:
+                out.append(command)
+                reachable = opcode != C_GOTO and opcode != C_RETURN
+
+        optimized = [expanded for command in out for expanded in _expand(command)]
+        self.total += total
+        self.removed += total - len(optimized)
+
+        return optimized
+
+    def _arithmetic(self, command: VMCommand, out: List[VMCommand], block_start: int) -> None:
+        """
+        Appends an arithmetic command to the output, folding it into the commands before it when possible.
+        """
+        op = command.arg1
+        top = out[-1] if len(out) > block_start else None
+
+        if op in _UNARY:
+            if top and _is_constant(top):
+                out[-1] = _constant(_UNARY[op](top.arg2), top.line_num)
+            elif top and top.opcode == C_ARITHMETIC and top.arg1 == op: # not / not, neg / neg
+                out.pop()
+            else:
+                out.append(command)
+            return
+
+        second = out[-2] if len(out) > block_start + 1 else None
+
+        if top and _is_constant(top) and second and _is_constant(second):
+            out.pop()
+            out[-1] = _constant(_BINARY[op](second.arg2, top.arg2), second.line_num)
+        elif top and _is_constant(top) and (op, top.arg2) in _IDENTITIES:
+            out.pop()
+        else:
+            out.append(command)
+
+    def _if_goto(self, command: VMCommand, out: List[VMCommand], block_start: int) -> None:
+        """
+        Appends an if-goto command to the output, turning it into a simpler branch when possible.
+        """
+        top = out[-1] if len(out) > block_start else None
+        second = out[-2] if len(out) > block_start + 1 else None
+
+        if top and _is_constant(top):
+            out.pop()
+            if top.arg2 != 0: # always jumps
+                out.append(VMCommand(C_GOTO, command.arg1, 0, command.line_num))
+            return
+
+        if top and top.opcode == C_ARITHMETIC and top.arg1 == "not" \
+                and second and second.opcode == C_ARITHMETIC and second.arg1 == "eq":
+            out.pop()
+            out[-1] = VMCommand(C_ARITHMETIC, "sub", 0, second.line_num)
+
+        out.append(command)
+
+    def report(self) -> str:
+        """
+        Summarizes how many commands were removed.
+        """
+        percent = self.removed / self.total if self.total else 0
+        return f"vm optimizer: removed {self.removed} of {self.total} commands ({percent:.1%})"
+
+
+def _is_constant(command: VMCommand) -> bool:
+    return command.opcode == C_PUSH and command.arg1 == "constant"
+
+
+def _constant(value: int, line_num: int) -> VMCommand:
+    """
+    Makes a folded constant, which may be out of the range of `push constant` until it is expanded.
+    """
+    return VMCommand(C_PUSH, "constant", value, line_num)
+
+
+def _expand(command: VMCommand) -> List[VMCommand]:
+    """
+    Turns a folded constant back into valid VM commands. Any other command is kept as is.
+    """
+    if not _is_constant(command) or 0 <= command.arg2 <= 32767:
+        return [command]
+
+    if command.arg2 == -32768: # its negation doesn't fit either
+        return [_constant(32767, command.line_num), VMCommand(C_ARITHMETIC, "not", 0, command.line_num)]
+
+    return [_constant(-command.arg2, command.line_num), VMCommand(C_ARITHMETIC, "neg", 0, command.line_num)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports how many commands the VM optimizer removes from VM files.")
+    parser.add_argument("vm_inputs", nargs="+", help="paths to .vm files or to directories of .vm files")
+    parser.add_argument("--print", action="store_true", help="print the optimized commands")
+    args = parser.parse_args()
+
+    total = VMOptimizer()
+    for vm_input in args.vm_inputs:
+        if vm_input.endswith(".vm"):
+            vm_filenames = [vm_input]
+        else:
+            vm_filenames = sorted(os.path.join(vm_input, f) for f in os.listdir(vm_input) if f.endswith(".vm"))
+
+        optimizer = VMOptimizer()
+        for vm_filename in vm_filenames:
+            for command in optimizer.optimize(parse_file(vm_filename)):
+                if args.print:
+                    print(command)
+
+        print(f"{os.path.basename(os.path.normpath(vm_input))}: {optimizer.report()}")
+        total.total += optimizer.total
+        total.removed += optimizer.removed
+
+    if len(args.vm_inputs) > 1:
+        print(f"total: {total.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from typing import Iterable, Iterator, List, NamedTuple
+
+# opcodes of the parsed commands, in the order of `COMMAND_TYPES`
+C_ARITHMETIC = 0
+C_PUSH = 1
+C_POP = 2
+C_LABEL = 3
+C_GOTO = 4
+C_IF = 5
+C_FUNCTION = 6
+C_CALL = 7
+C_RETURN = 8
+
+# opcode -> command type name
+COMMAND_TYPES = ("C_ARITHMETIC", "C_PUSH", "C_POP", "C_LABEL", "C_GOTO", "C_IF", "C_FUNCTION", "C_CALL", "C_RETURN")
+
+# first word of a command -> opcode
+OPCODES = {
+    "add": C_ARITHMETIC,
+    "sub": C_ARITHMETIC,
+    "neg": C_ARITHMETIC,
+    "eq": C_ARITHMETIC,
+    "gt": C_ARITHMETIC,
+    "lt": C_ARITHMETIC,
+    "and": C_ARITHMETIC,
+    "or": C_ARITHMETIC,
+    "not": C_ARITHMETIC,
+    "push": C_PUSH,
+    "pop": C_POP,
+    "label": C_LABEL,
+    "goto": C_GOTO,
+    "if-goto": C_IF,
+    "function": C_FUNCTION,
+    "call": C_CALL,
+    "return": C_RETURN
+}
+
+
+def wrap(value: int) -> int:
+    """
+    Wraps an integer around to the signed 16-bit range, like the Hack ALU does.
+    """
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+class VMCommand(NamedTuple):
+    """
+    A VM command, split into its parts once so that consumers never look at the text again.
+
+    Attributes:
+        opcode (int): The command type, one of the `C_*` opcodes.
+        arg1 (str): The arithmetic command itself, the segment, the label or the function name. Empty for return.
+        arg2 (int): The segment index, the number of locals or the number of args. 0 if the command has none.
+        line_num (int): The 0-based line of the command in its file.
+    """
+    opcode: int
+    arg1: str
+    arg2: int
+    line_num: int
+
+    def __str__(self) -> str:
+        if self.opcode == C_ARITHMETIC:
+            return self.arg1
+        if self.opcode == C_RETURN:
+            return "return"
+
+        keyword = ("push", "pop", "label", "goto", "if-goto", "function", "call")[self.opcode - 1]
+        if self.opcode in (C_PUSH, C_POP, C_FUNCTION, C_CALL):
+            return f"{keyword} {self.arg1} {self.arg2}"
+        return f"{keyword} {self.arg1}"
+
+
+def parse_command(line: str, line_num: int = 0) -> VMCommand:
+    """
+    Parses a single VM command.
+
+    Args:
+        line (str): The command, without comments.
+        line_num (int, optional): The line of the command in its file. Defaults to 0.
+
+    Returns:
+        VMCommand: The parsed command.
+    """
+    words = line.split()
+    opcode = OPCODES.get(words[0]) if words else None
+
+    if opcode is None:
+        raise ValueError(f"Unknown command: {line}")
+
+    if opcode == C_ARITHMETIC:
+        return VMCommand(opcode, words[0], 0, line_num)
+    if opcode == C_RETURN:
+        return VMCommand(opcode, "", 0, line_num)
+    if len(words) > 2:
+        return VMCommand(opcode, words[1], int(words[2]), line_num)
+    return VMCommand(opcode, words[1], 0, line_num)
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[VMCommand]:
+    """
+    Parses lines of VM code, skipping comments and empty lines.
+
+    Args:
+        lines (Iterable[str]): Lines of VM code, e.g. an open .vm file.
+
+    Yields:
+        VMCommand: Each command, in order.
+    """
+    new = tuple.__new__ # builds the records without going through the NamedTuple constructor, ~2x faster
+    opcodes = OPCODES
+
+    for line_num, line in enumerate(lines):
+        if "//" in line:
+            line = line[:line.index("//")]
+        words = line.split()
+        if not words:
+            continue # ignore empty line/ comment
+
+        opcode = opcodes.get(words[0])
+        if opcode is None or len(words) == 1 or opcode == C_ARITHMETIC: # arithmetic | return | unknown
+            yield parse_command(line, line_num)
+        elif len(words) > 2:
+            yield new(VMCommand, (opcode, words[1], int(words[2]), line_num))
+        else:
+            yield new(VMCommand, (opcode, words[1], 0, line_num))
+
+
+def parse_file(vm_filename: str) -> List[VMCommand]:
+    """
+    Parses a VM file.
+
+    Args:
+        vm_filename (str): Path to the VM file.
+
+    Returns:
+        List[VMCommand]: The commands of the file, in order.
+    """
+    with open(vm_filename, "r") as infile:
+        return list(parse_lines(infile.read().splitlines()))